@@ -2,4 +2,8 @@
 
 from . import models
 from . import controllers
+from .controllers.preflight import install_preflight_middleware
 
+
+def post_load():
+    install_preflight_middleware()
@@ -19,31 +19,131 @@ Features:
 Usage:
 Sections:
 - POST /api/sections/create - Create a new section
-- GET /api/sections/list - List all active sections
+- GET /api/sections/list - List active sections (paginated)
 - GET /api/sections/get/<id> - Get specific section
+- GET /api/sections/get?ids=<1,2,3> - Get many sections by ID, in order;
+  include=machines embeds their machines
+- GET /api/sections/by_code/<code> - Get a section and its machines by Section ID
+- GET /api/sections/by_code?codes=<a,b,c> - Get many sections by Section ID
+- GET /api/sections/stats - Machine counts and last changes of every section
 - PUT /api/sections/update/<id> - Update section
 - DELETE /api/sections/delete/<id> - Delete section (soft delete)
+- POST /api/sections/bulk - Create, update and archive many sections
 
 Machines:
 - POST /api/machines/create - Create a new machine (requires section_id)
-- GET /api/machines/list - List all active machines
+- GET /api/machines/list - List active machines (paginated)
 - GET /api/machines/get/<id> - Get specific machine
+- GET /api/machines/get?ids=<1,2,3> - Get many machines by ID, in order
 - GET /api/machines/by_section/<section_id> - Get machines by section
 - PUT /api/machines/update/<id> - Update machine
 - DELETE /api/machines/delete/<id> - Delete machine (soft delete)
+- POST /api/machines/bulk - Create, update and archive many machines
+
+Bulk operations:
+Bulk endpoints take {"operations": [...]} where each operation is
+{"op": "create", "values": {...}}, {"op": "update", "id": <id>, "values": {...}}
+or {"op": "archive", "id": <id>}, and return one result per operation.
+Requests with async=1 or more than 5000 operations (up to 100000) are
+queued instead and answered with 202 and a job to poll.
+
+Concurrent edits:
+Sections and machines carry a version, bumped by every write. Sending it
+back with an update ("version" in the body or X-Record-Version: <version>) makes
+the update apply only if nobody changed the record since; otherwise it
+fails at once with 409 and the current version, without waiting for or
+retrying against the other edit.
+
+Background jobs:
+- GET /api/jobs/<id> - Progress of a queued bulk request or section
+  propagation, with the per-operation results once a bulk job is done
+Renaming or moving a section with more than 1000 machines copies the new
+name/location to its machines in a background job, in committed batches.
+
+Notifications:
+- GET /api/bus/channels?section_ids=<1,2> - Bus channels to subscribe to
+  through /websocket; every committed transaction sends one event per
+  touched section listing the changed section and machine ids
+
+Sync:
+- GET /api/sync?since=<token> - Sections and machines changed since a
+  previous sync, with tombstones for archived records and a next_token
+
+Export:
+- GET /api/export - Stream active sections, each followed by its active
+  machines, as NDJSON
+
+Conditional requests:
+GET endpoints return ETag and Last-Modified headers and answer
+304 Not Modified when If-None-Match / If-Modified-Since still match.
+
+Response cache:
+Each worker keeps an LRU cache of GET responses, invalidated across
+workers whenever a section or machine is created, written or deleted. It
+holds at most 512 responses and 32 MiB of bodies; bodies over 1 MiB are
+not cached.
+- GET /api/cache/stats - Hit/miss/eviction counters of the serving worker
+
+Read routes:
+Every GET route is declared readonly (Odoo's readonly route option), so Odoo
+serves it with a read-only cursor, opened on the read replica when
+db_replica_host / db_replica_port are configured. While the replica lags more than
+kiosk_api_replica_max_lag seconds (default 5, measured every 5 seconds
+per worker), or cannot be reached, read routes are served by the primary.
+
+Rate limiting:
+Every client has a token bucket for read (GET) and one for write routes,
+shared by all workers of the server through a memory-mapped file in the
+Odoo data directory. Clients are told apart by their X-API-Key header when
+it holds one of the keys listed in kiosk_api_keys (comma separated), or
+else by their address. Over the limit, requests get 429 with Retry-After
+before any database work. Limits are set in the Odoo configuration file as
+"<requests per second>,<burst>" (0 disables):
+    kiosk_api_rate_limit_read = 20,60
+    kiosk_api_rate_limit_write = 5,30
+
+CORS:
+Preflight (OPTIONS) requests for the API are answered before Odoo's request
+pipeline, without opening a database cursor, and may be cached by browsers
+for a day (Access-Control-Max-Age).
+
+Instrumentation:
+- GET /api/metrics - Per-route request counts, latency and size histograms,
+  SQL and JSON encode time of the serving worker (Prometheus text format)
+Set kiosk_api_server_timing = True in the Odoo configuration file to
+return the same measurements in a Server-Timing header on every response.
+
+Serialization:
+Responses are encoded with orjson when it is installed and with the
+standard json module otherwise. Clients sending Accept: application/msgpack
+get MessagePack instead when the msgpack package is installed. Responses of
+1 KiB or more are compressed with brotli (when the brotli package is
+installed) or gzip, following Accept-Encoding.
+- format=columnar - On list, by_section and by_code endpoints, return one
+  array per field instead of one object per record; machine listings then
+  carry section name and location once per section in a sections table
+
+Pagination:
+List endpoints return one page ordered by name and a next_cursor value.
+- limit=<n> - Page size (default 100, max 1000)
+- after=<next_cursor> - Fetch the page following a previous response
+- fields=<a,b,c> - Only return the listed fields (id is always included)
     """,
     'author': 'Your Name',
     'website': 'https://www.odoo.com',
     'license': 'LGPL-3',
     'depends': [
         'base',
+        'bus',
         'point_of_sale',
     ],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/section_views.xml',
         'views/machine_views.xml',
     ],
+    'post_load': 'post_load',
     'installable': True,
     'application': False,
     'auto_install': False,
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""Benchmark every route of the Sections and Machines API
+
+Seeds a local Odoo database where this addon is installed with benchmark
+sections and machines, then calls each route through Odoo's WSGI
+application in process (werkzeug test client, no network) and records per
+route:
+
+- latency percentiles (p50/p95/p99, milliseconds)
+- SQL queries per request, from odoo.sql_db.sql_counter
+- response size in bytes
+
+Results are written as JSON so runs can be compared between commits:
+
+    python benchmarks/bench_routes.py -c odoo.conf -d bench_db \\
+        --machines 100,10000,100000 --sections 50 --requests 200 \\
+        --output bench_output.json
+
+Benchmark records use section codes starting with BENCH- and are deleted
+before each dataset size is seeded. Pass --cold to clear the response cache
+before every request, and --explain to record which indexes the planner
+uses for the queries behind the routes.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from _common import git_revision, summarize
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADDON = os.path.basename(os.path.dirname(HERE))
+CODE_PREFIX = 'BENCH-'
+SEED_BATCH_SIZE = 5000
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-c', '--config', help='Odoo configuration file')
+    parser.add_argument('-d', '--database', required=True, help='database with the addon installed')
+    parser.add_argument('--machines', default='100,10000',
+                        help='comma separated machine counts to benchmark (default: 100,10000)')
+    parser.add_argument('--sections', type=int, default=50, help='sections the machines are spread over')
+    parser.add_argument('--requests', type=int, default=100, help='requests per route and dataset size')
+    parser.add_argument('--routes', help='comma separated route names to run (default: all)')
+    parser.add_argument('--cold', action='store_true', help='clear the response cache before every request')
+    parser.add_argument('--explain', action='store_true',
+                        help='record the indexes PostgreSQL picks for the API query shapes')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    return parser.parse_args(argv)
+
+
+# ==================== DATASET ====================
+
+def seed(registry, machines, sections, scratch):
+    """Replace the benchmark records by a fresh dataset and return the ids to call routes with
+
+    scratch extra sections and machines are created for the delete routes,
+    which archive one record per request.
+    """
+    from odoo import api, SUPERUSER_ID
+
+    with registry.cursor() as cr:
+        # machines go with their section through ON DELETE CASCADE
+        cr.execute("DELETE FROM kiosk_section WHERE section_id LIKE %s", [CODE_PREFIX + '%'])
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        Section = env['kiosk.section']
+        Machine = env['section.machine']
+
+        section_ids = Section.create([{
+            'name': f'Bench Section {index:05d}',
+            'section_id': f'{CODE_PREFIX}{index:05d}',
+            'location': f'Floor {index % 5}',
+        } for index in range(sections)]).ids
+        scratch_section_ids = Section.create([{
+            'name': f'Bench Scratch Section {index:05d}',
+            'section_id': f'{CODE_PREFIX}SCRATCH-{index:05d}',
+            'location': 'Scratch',
+        } for index in range(scratch)]).ids
+
+        machine_ids = []
+        for start in range(0, machines, SEED_BATCH_SIZE):
+            machine_ids += Machine.create([{
+                'name': f'Bench Machine {index:07d}',
+                'section_id': section_ids[index % len(section_ids)],
+            } for index in range(start, min(machines, start + SEED_BATCH_SIZE))]).ids
+            env.invalidate_all()
+        scratch_machine_ids = Machine.create([{
+            'name': f'Bench Scratch Machine {index:05d}',
+            'section_id': section_ids[0],
+        } for index in range(scratch)]).ids
+        cr.execute("ANALYZE kiosk_section")
+        cr.execute("ANALYZE section_machine")
+
+    return {
+        'section_ids': section_ids,
+        'machine_ids': machine_ids,
+        'scratch_section_ids': scratch_section_ids,
+        'scratch_machine_ids': scratch_machine_ids,
+    }
+
+
+# ==================== QUERY PLANS ====================
+# Query shapes issued by the API, keyed by a short name
+
+QUERY_SHAPES = {
+    'sections_page': """
+        SELECT id, name FROM kiosk_section
+         WHERE active AND (name > %(name)s OR (name = %(name)s AND id > %(id)s))
+      ORDER BY name, id LIMIT 101
+    """,
+    'machines_page': """
+        SELECT id, name FROM section_machine
+         WHERE active AND (name > %(name)s OR (name = %(name)s AND id > %(id)s))
+      ORDER BY name, id LIMIT 101
+    """,
+    'machines_by_section': """
+        SELECT id, name FROM section_machine
+         WHERE section_id = %(section_id)s AND active
+      ORDER BY name, id
+    """,
+    'machine_counts': """
+        SELECT section_id, count(*) FROM section_machine
+         WHERE section_id = ANY(%(section_ids)s) AND active
+      GROUP BY section_id
+    """,
+    'machines_changed': """
+        SELECT id, write_xid FROM section_machine
+         WHERE write_xid < txid_snapshot_xmin(txid_current_snapshot()) AND (write_xid, id) > (0, 0)
+      ORDER BY write_xid, id LIMIT 101
+    """,
+}
+
+
+def _plan_indexes(plan):
+    """Names of the indexes used anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    found = set()
+    if plan.get('Index Name'):
+        found.add(plan['Index Name'])
+    for child in plan.get('Plans', ()):
+        found |= _plan_indexes(child)
+    return found
+
+
+def explain(registry, ids):
+    params = {
+        'name': 'Bench Machine',
+        'id': 0,
+        'section_id': ids['section_ids'][0],
+        'section_ids': ids['section_ids'][:100],
+    }
+    plans = {}
+    with registry.cursor() as cr:
+        for name, query in QUERY_SHAPES.items():
+            cr.execute('EXPLAIN (FORMAT JSON) ' + query, params)
+            plan = cr.fetchone()[0][0]['Plan']
+            plans[name] = sorted(_plan_indexes(plan))
+    return plans
+
+
+# ==================== ROUTES ====================
+# Each route maps to a function (ids, iteration, run) -> (method, url, json body or None)
+
+def _pick(values, iteration):
+    return values[iteration % len(values)]
+
+
+ROUTES = {
+    'sections_list': lambda ids, i, run: ('GET', '/api/sections/list', None),
+    'sections_get': lambda ids, i, run: ('GET', f"/api/sections/get/{_pick(ids['section_ids'], i)}", None),
+    'sections_get_many': lambda ids, i, run: ('GET', '/api/sections/get?include=machines&ids=' + ','.join(
+        str(_pick(ids['section_ids'], i + offset)) for offset in range(10)), None),
+    'sections_by_code': lambda ids, i, run: (
+        'GET', f"/api/sections/by_code/{CODE_PREFIX}{i % len(ids['section_ids']):05d}", None),
+    'sections_by_codes': lambda ids, i, run: ('GET', '/api/sections/by_code?codes=' + ','.join(
+        f"{CODE_PREFIX}{(i + offset) % len(ids['section_ids']):05d}" for offset in range(20)), None),
+    'sections_stats': lambda ids, i, run: ('GET', '/api/sections/stats', None),
+    'sections_create': lambda ids, i, run: ('POST', '/api/sections/create', {
+        'name': f'Bench New Section {run}-{i}',
+        'section_id': f'{CODE_PREFIX}NEW-{run}-{i}',
+        'location': 'Bench',
+    }),
+    'sections_update': lambda ids, i, run: ('PUT', f"/api/sections/update/{_pick(ids['section_ids'], i)}", {
+        'location': f'Floor {i % 5}',
+    }),
+    'sections_delete': lambda ids, i, run: ('DELETE', f"/api/sections/delete/{ids['scratch_section_ids'][i]}", None),
+    'sections_bulk': lambda ids, i, run: ('POST', '/api/sections/bulk', {'operations': [{
+        'op': 'update',
+        'id': _pick(ids['section_ids'], i + offset),
+        'values': {'location': f'Floor {i % 5}'},
+    } for offset in range(10)]}),
+    'machines_list': lambda ids, i, run: ('GET', '/api/machines/list', None),
+    'machines_get': lambda ids, i, run: ('GET', f"/api/machines/get/{_pick(ids['machine_ids'], i)}", None),
+    'machines_get_many': lambda ids, i, run: ('GET', '/api/machines/get?ids=' + ','.join(
+        str(_pick(ids['machine_ids'], i + offset)) for offset in range(40)), None),
+    'machines_by_section': lambda ids, i, run: (
+        'GET', f"/api/machines/by_section/{_pick(ids['section_ids'], i)}", None),
+    'machines_create': lambda ids, i, run: ('POST', '/api/machines/create', {
+        'name': f'Bench New Machine {run}-{i}',
+        'section_id': _pick(ids['section_ids'], i),
+    }),
+    'machines_update': lambda ids, i, run: ('PUT', f"/api/machines/update/{_pick(ids['machine_ids'], i)}", {
+        'name': f'Bench Machine Renamed {run}-{i}',
+    }),
+    'machines_delete': lambda ids, i, run: ('DELETE', f"/api/machines/delete/{ids['scratch_machine_ids'][i]}", None),
+    'machines_bulk': lambda ids, i, run: ('POST', '/api/machines/bulk', {'operations': [{
+        'op': 'create',
+        'values': {'name': f'Bench Bulk Machine {run}-{i}-{offset}', 'section_id': _pick(ids['section_ids'], offset)},
+    } for offset in range(100)]}),
+    'bus_channels': lambda ids, i, run: ('GET', '/api/bus/channels?section_ids=' + ','.join(
+        str(section_id) for section_id in ids['section_ids'][:10]), None),
+    'cache_stats': lambda ids, i, run: ('GET', '/api/cache/stats', None),
+    'metrics': lambda ids, i, run: ('GET', '/api/metrics', None),
+    'sync': lambda ids, i, run: ('GET', '/api/sync', None),
+    'export': lambda ids, i, run: ('GET', '/api/export', None),
+}
+
+
+def run_route(client, build, ids, requests, run, clear_cache):
+    import odoo.sql_db
+
+    latencies, queries, sizes, statuses = [], [], [], {}
+    for iteration in range(requests):
+        method, url, body = build(ids, iteration, run)
+        data = json.dumps(body) if body is not None else None
+        if clear_cache:
+            clear_cache()
+        sql_before = odoo.sql_db.sql_counter
+        start = time.perf_counter()
+        response = client.open(url, method=method, data=data, content_type='application/json')
+        payload = response.get_data()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        queries.append(odoo.sql_db.sql_counter - sql_before)
+        sizes.append(len(payload))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return {
+        'method': method,
+        'requests': requests,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        'latency_ms': summarize(latencies),
+        'sql_queries': summarize(queries, digits=1),
+        'response_bytes': summarize(sizes, digits=0),
+    }
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    import odoo
+    from odoo.tools import config
+    from werkzeug.test import Client
+
+    config.parse_config((['-c', args.config] if args.config else []) + ['-d', args.database])
+    config['dbfilter'] = f'^{args.database}$'
+    # Every request comes from the same client: measure the routes, not the rate limiter
+    config['kiosk_api_rate_limit_read'] = config['kiosk_api_rate_limit_write'] = '0'
+    odoo.service.server.load_server_wide_modules()
+    registry = odoo.modules.registry.Registry(args.database)
+
+    clear_cache = None
+    if args.cold:
+        api_module = __import__(f'odoo.addons.{ADDON}.controllers.sections_machines_api',
+                                fromlist=['response_cache'])
+        clear_cache = api_module.response_cache.clear
+
+    route_names = args.routes.split(',') if args.routes else list(ROUTES)
+    unknown = set(route_names) - set(ROUTES)
+    if unknown:
+        raise SystemExit(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+    client = Client(odoo.http.root)
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'odoo_version': odoo.release.version,
+            'requests_per_route': args.requests,
+            'cold_cache': args.cold,
+        },
+        'runs': [],
+    }
+    for run, machines in enumerate(int(size) for size in args.machines.split(',')):
+        ids = seed(registry, machines, args.sections, scratch=args.requests)
+        results = {}
+        for name in route_names:
+            results[name] = run_route(client, ROUTES[name], ids, args.requests, run, clear_cache)
+            print(f"{machines:>8} machines  {name:<22} p50 {results[name]['latency_ms']['p50']:>9.2f} ms  "
+                  f"sql {results[name]['sql_queries']['p50']:>6}", file=sys.stderr)
+        run_report = {'machines': machines, 'sections': args.sections, 'routes': results}
+        if args.explain:
+            run_report['query_indexes'] = explain(registry, ids)
+        report['runs'].append(run_report)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
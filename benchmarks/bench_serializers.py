@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmark of the JSON encoding path of the API
+
+Compares the per-record dict building + json.dumps path the controller used
+to take with RecordEncoder + serializers.dumps, with and without orjson, on
+synthetic search_read rows, then the size on the wire of the records and
+columnar (format=columnar) forms, raw and compressed. Runs without Odoo:
+
+    python benchmarks/bench_serializers.py [sizes...]
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SPEC = importlib.util.spec_from_file_location(
+    'serializers', os.path.join(HERE, os.pardir, 'controllers', 'serializers.py'))
+serializers = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(serializers)
+
+MACHINE_FIELDS = ('id', 'name', 'section_id', 'section_name', 'section_location', 'created_at', 'updated_at')
+# SectionsMachinesAPI.MACHINE_SECTION_COLUMNS
+MACHINE_SECTION_COLUMNS = {'section_name': 'name', 'section_location': 'location'}
+
+
+def make_rows(count, sections=50):
+    """Machine rows shaped like search_read(load=None) results"""
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': index,
+        'name': f'Machine {index:06d}',
+        'section_id': index % sections + 1,
+        'section_name': f'Section {index % sections + 1}',
+        'section_location': f'Floor {index % 3} - Aisle {index % sections}',
+        # Imports write machines in batches sharing their timestamps
+        'created_at': start + timedelta(seconds=index // 500),
+        'updated_at': start + timedelta(seconds=index // 100),
+    } for index in range(1, count + 1)]
+
+
+def legacy_encode(rows):
+    machines = [{
+        'id': row['id'],
+        'name': row['name'],
+        'section_id': row['section_id'],
+        'section_name': row['section_name'],
+        'section_location': row['section_location'],
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+        'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None,
+    } for row in rows]
+    return json.dumps({'success': True, 'machines': machines}, ensure_ascii=False).encode('utf-8')
+
+
+def encoder_encode(rows):
+    encoder = serializers.RecordEncoder(MACHINE_FIELDS, datetime_fields=('created_at', 'updated_at'))
+    return serializers.dumps({'success': True, 'machines': encoder.encode(rows)})
+
+
+def columnar_encode(rows):
+    """The machine listing body of format=columnar, built like SectionsMachinesAPI._machine_columns"""
+    encoder = serializers.RecordEncoder(MACHINE_FIELDS, datetime_fields=('created_at', 'updated_at'))
+    machines, sections = encoder.encode_joined_columns(rows, 'section_id', MACHINE_SECTION_COLUMNS)
+    return serializers.dumps({'success': True, 'machines': machines, 'sections': sections})
+
+
+def best_of(func, rows, repeat=5):
+    timings = []
+    for _i in range(repeat):
+        start = time.perf_counter()
+        body = func(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main(sizes):
+    orjson_module = serializers.orjson
+    variants = [('legacy json', legacy_encode, None)]
+    variants.append(('encoder + json', encoder_encode, None))
+    if orjson_module is not None:
+        variants.append(('encoder + orjson', encoder_encode, orjson_module))
+
+    print(f"{'records':>8}  {'variant':<18} {'best (ms)':>10} {'speedup':>8} {'bytes':>12}")
+    for size in sizes:
+        rows = make_rows(size)
+        baseline = None
+        for label, func, orjson_value in variants:
+            serializers.orjson = orjson_value
+            elapsed, size_bytes = best_of(func, rows)
+            baseline = baseline or elapsed
+            print(f'{size:>8}  {label:<18} {elapsed * 1000:>10.1f} {baseline / elapsed:>7.2f}x {size_bytes:>12}')
+    serializers.orjson = orjson_module
+
+    codings = serializers.content_codings()
+    print()
+    print(f"{'records':>8}  {'format':<18} {'encode (ms)':>11} {'bytes':>12}"
+          + ''.join(f' {coding + " bytes":>12} {"ratio":>6}' for coding in codings))
+    for size in sizes:
+        rows = make_rows(size)
+        baseline = None
+        for label, func in (('records', encoder_encode), ('columnar', columnar_encode)):
+            elapsed, _size_bytes = best_of(func, rows)
+            body = func(rows)
+            baseline = baseline or len(body)
+            line = f'{size:>8}  {label:<18} {elapsed * 1000:>11.1f} {len(body):>12}'
+            for coding in codings:
+                compressed = len(serializers.compress(body, coding))
+                line += f' {compressed:>12} {baseline / compressed:>5.1f}x'
+            print(line)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""Load and soak test of the Sections and Machines API with a simulated kiosk fleet
+
+Unlike bench_routes.py, which calls one route at a time in process, this
+script drives a running Odoo server over HTTP with many concurrent kiosks,
+to find the concurrency ceiling of the API and check that it scales across
+worker processes. Each kiosk is an asyncio task sharing one pooled
+aiohttp session; every poll interval it:
+
+- polls /api/sections/list and /api/machines/by_section/<its section>,
+  revalidating with If-None-Match like the kiosk app does
+- now and then renames one of its machines (update_machine)
+- now and then registers a burst of machines at once (create_machine)
+
+Per route it reports throughput, latency percentiles (milliseconds), error
+rate and status codes, for every combination of dataset size and worker
+count. Against a server started by hand:
+
+    python benchmarks/load_kiosks.py --url http://localhost:8069 \\
+        --kiosks 200 --duration 60 --machines 1000,10000,100000
+
+To vary the worker count, let the script start odoo-bin itself, once per
+--workers value:
+
+    python benchmarks/load_kiosks.py --odoo-bin ./odoo-bin -c odoo.conf -d load_db \\
+        --workers 0,2,4,8 --kiosks 200 --duration 60 --output load.json
+
+For soak runs pass a long --duration and --window: every window is also
+reported separately, so latency creeping up or errors appearing over time
+show in the report.
+
+The dataset is seeded through the bulk endpoints: sections use codes
+starting with LOAD- and are created once, machines are added until each
+--machines size is reached, so sizes are run in increasing order. Requires
+aiohttp.
+
+Kiosks send X-API-Key load-kiosk-<n> and seeding load-seed. The server only
+gives them their own rate limit buckets when kiosk_api_keys lists them;
+otherwise all requests from this host share one bucket, so list the keys or
+disable rate limiting in the Odoo configuration of the server under test.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from _common import git_revision, summarize
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+CODE_PREFIX = 'LOAD-'
+# Operations per bulk request while seeding (the synchronous bulk limit)
+SEED_BATCH_SIZE = 5000
+# Codes per /api/sections/by_code request (the API page size limit)
+CODES_BATCH_SIZE = 1000
+SEED_HEADERS = {'X-API-Key': 'load-seed'}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8069', help='base URL of the Odoo server')
+    parser.add_argument('--odoo-bin', help='start this odoo-bin once per --workers value instead of using a running server')
+    parser.add_argument('-c', '--config', help='Odoo configuration file, with --odoo-bin')
+    parser.add_argument('-d', '--database', help='database with the addon installed, with --odoo-bin')
+    parser.add_argument('--workers', default='2',
+                        help='comma separated Odoo --workers values, with --odoo-bin (default: 2)')
+    parser.add_argument('--port', type=int, default=8169, help='HTTP port of the server started by --odoo-bin')
+    parser.add_argument('--machines', default='1000,10000',
+                        help='comma separated machine counts to run with (default: 1000,10000)')
+    parser.add_argument('--sections', type=int, default=50, help='sections the machines are spread over')
+    parser.add_argument('--kiosks', type=int, default=50, help='concurrent simulated kiosks')
+    parser.add_argument('--connections', type=int, default=100, help='size of the HTTP connection pool')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run each combination')
+    parser.add_argument('--warmup', type=float, default=5.0, help='seconds of load before measuring')
+    parser.add_argument('--window', type=float, default=0.0,
+                        help='also report every WINDOW seconds separately (soak runs)')
+    parser.add_argument('--poll-interval', type=float, default=5.0, help='seconds between polls of a kiosk')
+    parser.add_argument('--update-probability', type=float, default=0.05,
+                        help='chance that a poll is followed by an update_machine')
+    parser.add_argument('--burst-probability', type=float, default=0.01,
+                        help='chance that a poll is followed by a create_machine burst')
+    parser.add_argument('--burst-size', type=int, default=10, help='machines created per burst')
+    parser.add_argument('--no-conditional', action='store_true', help='poll without If-None-Match')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the kiosk behaviour')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+    if args.odoo_bin and not args.database:
+        parser.error('--odoo-bin requires -d/--database')
+    return args
+
+
+# ==================== HTTP CLIENT ====================
+
+class Recorder:
+    """Per-route samples of the measured part of a run"""
+
+    def __init__(self, window):
+        self.window = window
+        self.measuring = False
+        self.started = None
+        self.samples = {}
+        self.windows = {}
+
+    def start(self):
+        self.measuring = True
+        self.started = time.perf_counter()
+
+    def record(self, route, status, latency_ms):
+        if not self.measuring:
+            return
+        self.samples.setdefault(route, []).append((status, latency_ms))
+        if self.window:
+            index = int((time.perf_counter() - self.started) // self.window)
+            self.windows.setdefault(index, {}).setdefault(route, []).append((status, latency_ms))
+
+    @staticmethod
+    def _route_report(samples, elapsed):
+        statuses = {}
+        for status, _latency in samples:
+            statuses[status] = statuses.get(status, 0) + 1
+        # 304 is the expected answer to an unchanged poll; status 0 is a
+        # connection error or timeout
+        errors = sum(count for status, count in statuses.items() if status == 0 or status >= 400)
+        return {
+            'requests': len(samples),
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'error_rate': round(errors / len(samples), 4),
+            'status_codes': {str(status): count for status, count in sorted(statuses.items())},
+            'latency_ms': summarize([latency for _status, latency in samples]),
+        }
+
+    def report(self, elapsed):
+        report = {
+            'elapsed_s': round(elapsed, 2),
+            'routes': {route: self._route_report(samples, elapsed)
+                       for route, samples in sorted(self.samples.items())},
+        }
+        if self.window:
+            report['windows'] = [{
+                'start_s': index * self.window,
+                'routes': {route: self._route_report(samples, self.window)
+                           for route, samples in sorted(routes.items())},
+            } for index, routes in sorted(self.windows.items())]
+        return report
+
+
+async def call(session, recorder, route, method, url, body=None, headers=None):
+    """Send one request and record it; return (status, headers, decoded JSON or None)"""
+    start = time.perf_counter()
+    try:
+        async with session.request(method, url, json=body, headers=headers) as response:
+            payload = await response.read()
+            status = response.status
+            response_headers = response.headers
+    except (asyncio.TimeoutError, OSError, aiohttp.ClientError):
+        recorder.record(route, 0, (time.perf_counter() - start) * 1000.0)
+        return 0, {}, None
+    recorder.record(route, status, (time.perf_counter() - start) * 1000.0)
+    data = None
+    if payload and response_headers.get('Content-Type', '').startswith('application/json'):
+        data = json.loads(payload)
+    return status, response_headers, data
+
+
+# ==================== DATASET ====================
+
+async def seed_call(session, recorder, method, url, body=None):
+    """call() for seeding: waits out rate limiting (429 + Retry-After) instead of failing"""
+    while True:
+        status, headers, data = await call(session, recorder, 'seed', method, url, body, SEED_HEADERS)
+        if status != 429:
+            return status, headers, data
+        await asyncio.sleep(float(headers.get('Retry-After', 1)))
+
+
+async def seed(session, base_url, machines, sections):
+    """Create the load sections if needed and top their machines up to machines
+
+    Returns {section id: [machine ids]}.
+    """
+    recorder = Recorder(0)
+    codes = [f'{CODE_PREFIX}{index:05d}' for index in range(sections)]
+    section_ids = {}
+    for start in range(0, len(codes), CODES_BATCH_SIZE):
+        batch = codes[start:start + CODES_BATCH_SIZE]
+        _status, _headers, data = await seed_call(
+            session, recorder, 'GET', f"{base_url}/api/sections/by_code?codes={','.join(batch)}")
+        for section in (data or {}).get('sections', ()):
+            section_ids[section['section_id']] = section['id']
+
+    missing = [code for code in codes if code not in section_ids]
+    for start in range(0, len(missing), SEED_BATCH_SIZE):
+        operations = [{'op': 'create', 'values': {
+            'name': f'Load Section {code}',
+            'section_id': code,
+            'location': f'Floor {index % 5}',
+        }} for index, code in enumerate(missing[start:start + SEED_BATCH_SIZE], start)]
+        status, _headers, data = await seed_call(
+            session, recorder, 'POST', f'{base_url}/api/sections/bulk', {'operations': operations})
+        if status != 200 or not data['success']:
+            raise SystemExit(f'Seeding sections failed ({status}): {data}')
+        for operation, result in zip(operations, data['results']):
+            section_ids[operation['values']['section_id']] = result['id']
+
+    fleet = {}
+    for code in codes:
+        _status, _headers, data = await seed_call(
+            session, recorder, 'GET', f'{base_url}/api/machines/by_section/{section_ids[code]}')
+        fleet[section_ids[code]] = [machine['id'] for machine in (data or {}).get('machines', ())]
+
+    ordered_ids = [section_ids[code] for code in codes]
+    existing = sum(len(machine_ids) for machine_ids in fleet.values())
+    for start in range(existing, machines, SEED_BATCH_SIZE):
+        operations = [{'op': 'create', 'values': {
+            'name': f'Load Machine {index:07d}',
+            'section_id': ordered_ids[index % len(ordered_ids)],
+        }} for index in range(start, min(machines, start + SEED_BATCH_SIZE))]
+        status, _headers, data = await seed_call(
+            session, recorder, 'POST', f'{base_url}/api/machines/bulk', {'operations': operations})
+        if status != 200 or not data['success']:
+            raise SystemExit(f'Seeding machines failed ({status}): {data}')
+        for operation, result in zip(operations, data['results']):
+            fleet[operation['values']['section_id']].append(result['id'])
+    return fleet
+
+
+# ==================== KIOSKS ====================
+
+class Kiosk:
+    """One simulated kiosk, bound to a section"""
+
+    def __init__(self, number, session, recorder, base_url, section_id, machine_ids, args):
+        self.number = number
+        self.session = session
+        self.recorder = recorder
+        self.base_url = base_url
+        self.section_id = section_id
+        self.machine_ids = machine_ids
+        self.args = args
+        self.random = random.Random(args.seed * 100003 + number)
+        self.etags = {}
+        self.created = 0
+        # Each kiosk has its own rate limit bucket, as in production, once the
+        # server lists these keys in kiosk_api_keys
+        self.headers = {'X-API-Key': f'load-kiosk-{number}'}
+
+    async def poll(self, route, path):
+        url = self.base_url + path
+        headers = self.headers
+        if not self.args.no_conditional and url in self.etags:
+            headers = dict(headers, **{'If-None-Match': self.etags[url]})
+        status, response_headers, data = await call(self.session, self.recorder, route, 'GET', url, headers=headers)
+        if status == 200 and response_headers.get('ETag'):
+            self.etags[url] = response_headers['ETag']
+        return status, data
+
+    async def update_machine(self):
+        if not self.machine_ids:
+            return
+        machine_id = self.random.choice(self.machine_ids)
+        await call(self.session, self.recorder, 'update_machine', 'PUT',
+                   f'{self.base_url}/api/machines/update/{machine_id}',
+                   {'name': f'Load Machine {machine_id} ({self.number}-{self.random.randrange(10 ** 6)})'},
+                   self.headers)
+
+    async def create_machine(self):
+        self.created += 1
+        status, _headers, data = await call(
+            self.session, self.recorder, 'create_machine', 'POST', f'{self.base_url}/api/machines/create',
+            {'name': f'Load Kiosk {self.number} Machine {self.created}', 'section_id': self.section_id},
+            self.headers)
+        if status == 200 and data:
+            self.machine_ids.append(data['machine']['id'])
+
+    async def run(self, stop):
+        # Spread the first polls over one interval instead of a thundering herd
+        await asyncio.sleep(self.random.uniform(0, self.args.poll_interval))
+        while not stop.is_set():
+            await self.poll('list_sections', '/api/sections/list')
+            await self.poll('by_section', f'/api/machines/by_section/{self.section_id}')
+            if self.random.random() < self.args.update_probability:
+                await self.update_machine()
+            if self.random.random() < self.args.burst_probability:
+                await asyncio.gather(*(self.create_machine() for _index in range(self.args.burst_size)))
+            jitter = self.random.uniform(0.8, 1.2)
+            try:
+                await asyncio.wait_for(stop.wait(), self.args.poll_interval * jitter)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def run_load(base_url, machines, args):
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        fleet = await seed(session, base_url, machines, args.sections)
+        section_ids = sorted(fleet)
+        recorder = Recorder(args.window)
+        stop = asyncio.Event()
+        kiosks = [
+            Kiosk(number, session, recorder, base_url, section_ids[number % len(section_ids)],
+                  fleet[section_ids[number % len(section_ids)]], args)
+            for number in range(args.kiosks)
+        ]
+        tasks = [asyncio.create_task(kiosk.run(stop)) for kiosk in kiosks]
+        await asyncio.sleep(args.warmup)
+        recorder.start()
+        await asyncio.sleep(args.duration)
+        elapsed = time.perf_counter() - recorder.started
+        recorder.measuring = False
+        stop.set()
+        await asyncio.gather(*tasks)
+        return recorder.report(elapsed)
+
+
+# ==================== SERVER ====================
+
+def start_server(args, workers):
+    """Start odoo-bin with the given worker count and wait until it answers"""
+    command = [args.odoo_bin, '-d', args.database, '--workers', str(workers),
+               '--http-port', str(args.port), '--max-cron-threads', '1']
+    if args.config:
+        command[1:1] = ['-c', args.config]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://localhost:{args.port}'
+    asyncio.run(wait_until_ready(process, base_url))
+    return process, base_url
+
+
+async def wait_until_ready(process, base_url, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f'odoo-bin exited with status {process.returncode}')
+            try:
+                async with session.get(f'{base_url}/web/health') as response:
+                    if response.status == 200:
+                        return
+            except (asyncio.TimeoutError, OSError, aiohttp.ClientError):
+                pass
+            await asyncio.sleep(0.5)
+    process.terminate()
+    raise SystemExit(f'odoo-bin did not answer on {base_url} within {timeout:.0f}s')
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if aiohttp is None:
+        raise SystemExit('load_kiosks.py requires aiohttp (pip install aiohttp)')
+
+    sizes = sorted(int(size) for size in args.machines.split(','))
+    worker_counts = [int(value) for value in args.workers.split(',')] if args.odoo_bin else [None]
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'kiosks': args.kiosks,
+            'connections': args.connections,
+            'duration_s': args.duration,
+            'poll_interval_s': args.poll_interval,
+            'update_probability': args.update_probability,
+            'burst_probability': args.burst_probability,
+            'burst_size': args.burst_size,
+            'conditional': not args.no_conditional,
+        },
+        'runs': [],
+    }
+    for workers in worker_counts:
+        process, base_url = start_server(args, workers) if args.odoo_bin else (None, args.url.rstrip('/'))
+        try:
+            for machines in sizes:
+                result = asyncio.run(run_load(base_url, machines, args))
+                for route, stats in result['routes'].items():
+                    print(f"workers {workers if workers is not None else '-':>3}  {machines:>8} machines  "
+                          f"{route:<16} {stats['throughput_rps']:>9.1f} req/s  "
+                          f"p99 {stats['latency_ms']['p99']:>9.2f} ms  errors {stats['error_rate']:.2%}",
+                          file=sys.stderr)
+                report['runs'].append(dict(result, workers=workers, machines=machines, sections=args.sections))
+        finally:
+            if process:
+                stop_server(process)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+
+class SectionCodeIndex:
+    """Per-worker map of section business keys (kiosk.section.section_id) to record ids
+
+    Codes are resolved lazily: unknown codes are looked up with one query
+    and remembered, including the ones that match no active section. The
+    map of a database is dropped when its 'sections' generation of
+    kiosk.api.cache changes, i.e. after any section is created, written or
+    deleted. Each database has its own map, since a worker may serve
+    several of them.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # {database name: (generation, {code: section id or None})}
+        self._maps = {}
+
+    def resolve(self, env, codes):
+        """Return {code: section id or None} for the given codes"""
+        # The generation is read before the data, see kiosk.api.cache
+        dbname = env.cr.dbname
+        generation = env['kiosk.api.cache'].sudo()._get_generation('sections')
+        with self._lock:
+            current = self._maps.get(dbname)
+            if current is None or current[0] != generation:
+                current = self._maps[dbname] = (generation, {})
+            ids = current[1]
+            missing = [code for code in codes if code not in ids]
+
+        if missing:
+            rows = env['kiosk.section'].sudo().search_read(
+                [('section_id', 'in', missing), ('active', '=', True)], ['section_id'],
+            )
+            found = {row['section_id']: row['id'] for row in rows}
+            with self._lock:
+                if self._maps.get(dbname) is current and len(ids) + len(missing) <= self.max_entries:
+                    for code in missing:
+                        ids[code] = found.get(code)
+            return {code: found[code] if code in found else ids.get(code) for code in codes}
+        return {code: ids[code] for code in codes}
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import threading
+import time
+
+from odoo.tools import config
+
+# Prometheus default latency buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Response size buckets, in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Encode time of the request being served by the current thread
+_current = threading.local()
+
+
+def add_encode_time(seconds):
+    """Account JSON encoding time to the request being served"""
+    _current.encode_time = getattr(_current, 'encode_time', 0.0) + seconds
+
+
+def server_timing_enabled():
+    """Server-Timing headers are sent when kiosk_api_server_timing is set in the Odoo configuration"""
+    return bool(config.get('kiosk_api_server_timing'))
+
+
+class _Histogram:
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class RouteMetrics:
+    """Per-route request metrics of the current worker process
+
+    Each Odoo worker keeps its own metrics: a scrape sees the worker that
+    served it, like any other multi-process Prometheus client.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._routes = {}
+
+    def observe(self, route, method, status, duration, sql_count, sql_time, encode_time, size):
+        with self._lock:
+            key = (route, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'duration': _Histogram(DURATION_BUCKETS),
+                    'size': _Histogram(SIZE_BUCKETS),
+                    'sql_queries': 0,
+                    'sql_seconds': 0.0,
+                    'encode_seconds': 0.0,
+                }
+            stats['duration'].observe(duration)
+            if size is not None:
+                stats['size'].observe(size)
+            stats['sql_queries'] += sql_count
+            stats['sql_seconds'] += sql_time
+            stats['encode_seconds'] += encode_time
+
+    def render(self, extra_lines=()):
+        """Return the metrics in Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP kiosk_api_requests_total Requests served, by route, method and status.',
+                '# TYPE kiosk_api_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(f'kiosk_api_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP kiosk_api_request_duration_seconds Wall time spent in the handler.',
+                '# TYPE kiosk_api_request_duration_seconds histogram',
+            ]
+            for route, stats in sorted(self._routes.items()):
+                lines += stats['duration'].render('kiosk_api_request_duration_seconds', f'route="{route}"')
+
+            lines += [
+                '# HELP kiosk_api_response_bytes Size of the response bodies.',
+                '# TYPE kiosk_api_response_bytes histogram',
+            ]
+            for route, stats in sorted(self._routes.items()):
+                lines += stats['size'].render('kiosk_api_response_bytes', f'route="{route}"')
+
+            for name, key, help_text in (
+                ('kiosk_api_sql_queries_total', 'sql_queries', 'SQL queries executed by the handler.'),
+                ('kiosk_api_sql_seconds_total', 'sql_seconds', 'Time spent in SQL queries.'),
+                ('kiosk_api_encode_seconds_total', 'encode_seconds', 'Time spent encoding JSON.'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for route, stats in sorted(self._routes.items()):
+                    lines.append(f'{name}{{route="{route}"}} {stats[key]}')
+
+        lines += list(extra_lines)
+        return '\n'.join(lines) + '\n'
+
+
+route_metrics = RouteMetrics()
+
+
+def instrumented(endpoint):
+    """Record wall time, SQL queries, encode time and response size of a handler
+
+    Apply it below @http.route. When server timing is enabled the
+    measurements are also returned in a Server-Timing header.
+    """
+    route = endpoint.__name__
+
+    @functools.wraps(endpoint)
+    def wrapper(self, *args, **kw):
+        from odoo.http import request
+
+        thread = threading.current_thread()
+        queries_before = getattr(thread, 'query_count', 0)
+        query_time_before = getattr(thread, 'query_time', 0.0)
+        _current.encode_time = 0.0
+        start = time.perf_counter()
+        status = 500
+        response = None
+        try:
+            response = endpoint(self, *args, **kw)
+            status = response.status_code
+            return response
+        finally:
+            duration = time.perf_counter() - start
+            sql_count = getattr(thread, 'query_count', 0) - queries_before
+            sql_time = getattr(thread, 'query_time', 0.0) - query_time_before
+            encode_time = _current.encode_time
+            # Streamed bodies have no length and are left out of the size histogram
+            size = response.content_length if response is not None else None
+            route_metrics.observe(route, request.httprequest.method, status, duration,
+                                  sql_count, sql_time, encode_time, size)
+            if response is not None and server_timing_enabled():
+                response.headers['Server-Timing'] = (
+                    f'total;dur={duration * 1000:.2f}, '
+                    f'db;dur={sql_time * 1000:.2f};desc="{sql_count} queries", '
+                    f'encode;dur={encode_time * 1000:.2f}'
+                )
+
+    return wrapper
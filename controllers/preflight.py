@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import functools
+
+import odoo.http
+
+# Paths served by SectionsMachinesAPI; preflights for them never reach Odoo's dispatcher
+API_PATH_PREFIXES = (
+    '/api/sections/',
+    '/api/machines/',
+    '/api/bus/',
+    '/api/cache/',
+    '/api/metrics',
+    '/api/sync',
+    '/api/export',
+    '/api/jobs/',
+)
+
+# Browsers may reuse a preflight answer for this many seconds
+PREFLIGHT_MAX_AGE = 86400
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, If-None-Match, If-Modified-Since, X-API-Key, X-Record-Version',
+    'Access-Control-Expose-Headers': 'ETag, Last-Modified, Retry-After, Server-Timing',
+    'Access-Control-Max-Age': str(PREFLIGHT_MAX_AGE),
+}
+
+
+def is_api_preflight(environ):
+    """Whether a WSGI request is a CORS preflight for one of the API routes"""
+    return (
+        environ.get('REQUEST_METHOD') == 'OPTIONS'
+        and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in environ
+        and environ.get('PATH_INFO', '').startswith(API_PATH_PREFIXES)
+    )
+
+
+def install_preflight_middleware():
+    """Answer API preflights in front of Odoo's WSGI application
+
+    Odoo resolves routes per database, so an OPTIONS request going through
+    the regular pipeline opens a cursor and sets up an environment before
+    the controller can answer it. The WSGI entry point is wrapped instead,
+    which answers preflights without touching the database. Installing
+    twice is a no-op.
+    """
+    application = type(odoo.http.root)
+    if getattr(application.__call__, 'kiosk_api_preflight', False):
+        return
+    dispatch = application.__call__
+
+    @functools.wraps(dispatch)
+    def __call__(self, environ, start_response):
+        if is_api_preflight(environ):
+            start_response('204 No Content', list(CORS_HEADERS.items()))
+            return [b'']
+        return dispatch(self, environ, start_response)
+
+    __call__.kiosk_api_preflight = True
+    application.__call__ = __call__
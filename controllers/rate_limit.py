@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+import fcntl
+import functools
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from odoo.http import request
+from odoo.tools import config
+
+# Default (tokens per second, burst) of each route class, per client
+DEFAULT_LIMITS = {
+    'read': (20.0, 60.0),
+    'write': (5.0, 30.0),
+}
+
+# Requests carrying one of the configured keys in this header are limited
+# per key instead of per IP, so kiosks behind one NAT address do not share a
+# bucket
+API_KEY_HEADER = 'X-API-Key'
+
+
+def rate_limits():
+    """Return {route class: (rate, burst)} from the Odoo configuration
+
+    kiosk_api_rate_limit_read / kiosk_api_rate_limit_write hold
+    "<tokens per second>,<burst>"; a rate of 0 disables the class.
+    """
+    limits = {}
+    for route_class, default in DEFAULT_LIMITS.items():
+        value = config.get(f'kiosk_api_rate_limit_{route_class}')
+        if value in (None, ''):
+            limits[route_class] = default
+            continue
+        rate, _sep, burst = str(value).partition(',')
+        rate = float(rate)
+        limits[route_class] = (rate, float(burst or rate)) if rate > 0 else None
+    return limits
+
+
+def api_keys():
+    """Return the API keys limited on their own, kiosk_api_keys (comma separated) in the Odoo configuration"""
+    return {key.strip() for key in str(config.get('kiosk_api_keys') or '').split(',') if key.strip()}
+
+
+class TokenBuckets:
+    """Token buckets shared by every worker process of the server
+
+    The buckets live in a memory-mapped file, so all Odoo workers of a host
+    (prefork or threaded, whenever they were started) update the same
+    table without going through the database. The table has a fixed number
+    of slots addressed by a hash of the bucket key; when the slots a key
+    may use are all taken, the least recently used one is reset, which can
+    only let a client through early, never block it wrongly.
+    """
+
+    _slot = struct.Struct('<Qdd')  # key hash, tokens, last update (epoch seconds)
+    _probes = 8
+
+    def __init__(self, path, slots=16384):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._pid = None
+        self._file = None
+        self._map = None
+
+    def _open(self):
+        # A mapping inherited through fork stays shared, but reopen per
+        # process anyway so each one holds its own flock file description
+        if self._pid == os.getpid():
+            return
+        size = self.slots * self._slot.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, 'r+b')
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._map = mmap.mmap(fd, size, mmap.MAP_SHARED)
+        self._pid = os.getpid()
+
+    def acquire(self, key, rate, burst):
+        """Take one token from the bucket of key
+
+        Returns 0 when the request may proceed, otherwise the number of
+        seconds until a token is available.
+        """
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+        with self._lock:
+            self._open()
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                offset = self._find(key_hash)
+                stored_hash, tokens, updated = self._slot.unpack_from(self._map, offset)
+                if stored_hash != key_hash:
+                    tokens, updated = burst, now
+                # Clock steps backwards are treated as no time passing
+                tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                    wait = 0.0
+                else:
+                    wait = (1.0 - tokens) / rate
+                self._slot.pack_into(self._map, offset, key_hash, tokens, now)
+                return wait
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _find(self, key_hash):
+        """Offset of the slot of key_hash: its own, an empty one or the least recently used"""
+        start = key_hash % self.slots
+        victim, victim_updated = None, None
+        for probe in range(self._probes):
+            offset = ((start + probe) % self.slots) * self._slot.size
+            stored_hash, _tokens, updated = self._slot.unpack_from(self._map, offset)
+            if stored_hash == key_hash or not stored_hash:
+                return offset
+            if victim is None or updated < victim_updated:
+                victim, victim_updated = offset, updated
+        return victim
+
+
+_buckets = None
+
+
+def token_buckets():
+    """The TokenBuckets of this server, stored in the Odoo data directory"""
+    global _buckets
+    if _buckets is None:
+        _buckets = TokenBuckets(os.path.join(config['data_dir'], 'kiosk_api_rate_limit.bin'))
+    return _buckets
+
+
+def client_key(httprequest):
+    """Identify the client a request is accounted to: its API key, or else its address
+
+    Only configured keys get their own bucket: a client sending a new
+    made-up key with every request would otherwise never be limited.
+    """
+    api_key = httprequest.headers.get(API_KEY_HEADER)
+    if api_key and api_key in api_keys():
+        return f'key:{api_key}'
+    return f'ip:{httprequest.remote_addr}'
+
+
+def rate_limited(route_class):
+    """Answer 429 with Retry-After once the client used up its route_class budget
+
+    The check only reads request headers and the shared buckets, so a
+    throttled request never reaches the ORM or the request body. Apply it
+    below @instrumented and above @json_body. OPTIONS requests are passed
+    through untouched.
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(self, *args, **kw):
+            httprequest = request.httprequest
+            limit = rate_limits()[route_class]
+            if httprequest.method != 'OPTIONS' and limit:
+                wait = token_buckets().acquire(f'{route_class}|{client_key(httprequest)}', *limit)
+                if wait:
+                    return self._json_response({
+                        'success': False,
+                        'message': 'Too many requests, retry later'
+                    }, status=429, headers={'Retry-After': str(max(1, math.ceil(wait)))})
+            return endpoint(self, *args, **kw)
+
+        return wrapper
+
+    return decorator
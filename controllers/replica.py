@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+
+from odoo.http import request
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Seconds a worker reuses a lag measurement before measuring again
+LAG_CHECK_INTERVAL = 5.0
+# Default for kiosk_api_replica_max_lag, in seconds
+DEFAULT_MAX_LAG = 5.0
+
+# Replay delay of a standby, given the WAL position of the primary read just
+# before: 0 once the standby replayed up to that position, otherwise the age
+# of the last transaction it replayed. Comparing with what the standby itself
+# received is not enough, since that reads 0 while streaming is stalled or
+# disconnected. NULL when the standby replayed no transaction since it started.
+LAG_QUERY = """
+    SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_replay_lsn() >= %s::pg_lsn THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+           END
+"""
+
+
+def replica_configured():
+    """Whether Odoo opens read-only cursors on a replica (db_replica_host/db_replica_port)"""
+    return bool(config.get('db_replica_host') or config.get('db_replica_port'))
+
+
+def max_lag():
+    """Replica lag tolerated by the read routes, kiosk_api_replica_max_lag in the Odoo configuration"""
+    return float(config.get('kiosk_api_replica_max_lag') or DEFAULT_MAX_LAG)
+
+
+class ReplicaLag:
+    """Replication lag of the read replica, as last measured by this worker
+
+    One measurement per database every LAG_CHECK_INTERVAL seconds: the WAL
+    position of the primary is read on a regular cursor, then compared with
+    the replay position of a read-only cursor, which Odoo opens on the
+    replica. An unreachable replica, or one whose lag cannot be told,
+    counts as infinitely late.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._measures = {}
+
+    def get(self, registry):
+        now = time.monotonic()
+        measure = self._measures.get(registry.db_name)
+        if measure is None or now - measure[0] >= LAG_CHECK_INTERVAL:
+            with self._lock:
+                measure = self._measures.get(registry.db_name)
+                if measure is None or now - measure[0] >= LAG_CHECK_INTERVAL:
+                    measure = self._measures[registry.db_name] = (now, self._measure(registry))
+        return measure[1]
+
+    def _measure(self, registry):
+        try:
+            with registry.cursor() as cr:
+                cr.execute("SELECT pg_current_wal_lsn()")
+                primary_lsn = cr.fetchone()[0]
+            with registry.cursor(readonly=True) as cr:
+                cr.execute(LAG_QUERY, [primary_lsn])
+                lag = cr.fetchone()[0]
+            lag = float('inf') if lag is None else float(lag)
+        except Exception:
+            _logger.warning("Could not measure the replication lag of %s, reading from the primary",
+                            registry.db_name, exc_info=True)
+            return float('inf')
+        if lag > max_lag():
+            _logger.info("Replica of %s is %.1fs behind, reading from the primary", registry.db_name, lag)
+        return lag
+
+
+replica_lag = ReplicaLag()
+
+
+def readonly_cursor(*_args):
+    """readonly= of the read routes: whether to serve them on a read-only cursor
+
+    Always without a replica, where read-only cursors come from the
+    primary. With a replica, only while its lag stays within max_lag();
+    past it the route gets a regular cursor on the primary. Odoo passes the
+    endpoint's controller, which the decision does not depend on.
+    """
+    if not replica_configured():
+        return True
+    return replica_lag.get(request.registry) <= max_lag()
+
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Process-local LRU cache of serialized GET responses
+
+    Entries are tagged with the cache generation (see kiosk.api.cache) they
+    were built under and are only served while that generation is current,
+    which keeps every worker consistent with writes made by the others.
+    The TTL bounds the lifetime of an entry regardless of the generation.
+    Memory is bounded by max_bytes over all entries, and values larger than
+    max_entry_size are not cached at all, so large pages cannot push out
+    everything else.
+    """
+
+    def __init__(self, max_entries=512, ttl=60, max_bytes=32 * 1024 * 1024, max_entry_size=1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_size = max_entry_size
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejections = 0
+
+    def get(self, key, generation):
+        """Return the value cached for key under generation, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_generation, expires_at, size, value = entry
+            if entry_generation != generation or expires_at < now:
+                del self._entries[key]
+                self._bytes -= size
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, generation, value, size=0):
+        """Cache value (of size bytes) for key under generation, evicting the least recently used entries"""
+        with self._lock:
+            if size > self.max_entry_size:
+                self.rejections += 1
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (generation, time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return the cache counters as a dictionary"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'rejections': self.rejections,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'max_entry_size': self.max_entry_size,
+                'ttl': self.ttl,
+            }
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import functools
+
+from odoo.http import request
+
+from .serializers import loads
+
+
+class Field:
+    """Spec of one field of a request body"""
+
+    __slots__ = ('type', 'required')
+
+    def __init__(self, type, required=False):
+        self.type = type
+        self.required = required
+
+    def coerce(self, name, value):
+        """Return value converted to the field type, raise ValueError if it does not fit"""
+        if self.type is int:
+            # int() would truncate 1.7 to 1
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError(f'{name} must be an integer')
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'{name} must be an integer')
+        if not isinstance(value, self.type):
+            raise ValueError(f'{name} must be of type {self.type.__name__}')
+        return value
+
+
+SECTION_SCHEMA = {
+    'name': Field(str, required=True),
+    'section_id': Field(str, required=True),
+    'location': Field(str, required=True),
+}
+
+MACHINE_SCHEMA = {
+    'name': Field(str, required=True),
+    'section_id': Field(int, required=True),
+}
+
+# Updates may carry the version they were made against, see _expected_version
+SECTION_UPDATE_SCHEMA = dict(SECTION_SCHEMA, version=Field(int))
+MACHINE_UPDATE_SCHEMA = dict(MACHINE_SCHEMA, version=Field(int))
+
+BULK_SCHEMA = {
+    'operations': Field(list, required=True),
+}
+
+
+def validate(schema, values, partial=False):
+    """Return the schema fields found in values, coerced to their type
+
+    Unknown keys are ignored. Required fields must be given and not empty;
+    with partial (updates) only the fields given are checked.
+    """
+    if not isinstance(values, dict):
+        raise ValueError('Expected a JSON object')
+    result = {}
+    for name, spec in schema.items():
+        if name not in values:
+            if spec.required and not partial:
+                raise ValueError(f'{name} is required')
+            continue
+        value = values[name]
+        if spec.required and value in (None, '', False):
+            raise ValueError(f'{name} is required')
+        result[name] = spec.coerce(name, value)
+    return result
+
+
+def _read_body(httprequest, limit):
+    """Return the request body, reading at most limit + 1 bytes of it
+
+    The input stream is read directly: by the time the handler runs, Odoo
+    has already created it with its own (much larger) size limit, so
+    lowering max_content_length would not stop a chunked body without
+    Content-Length from being read whole. Odoo's HTTPRequest does not
+    expose the stream, which is taken from the werkzeug request it wraps.
+    """
+    stream = getattr(httprequest, '_HTTPRequest__wrapped', httprequest).stream
+    chunks = []
+    size = 0
+    # Reads may return less than asked for before the end of the body
+    while size <= limit:
+        chunk = stream.read(limit + 1 - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return b''.join(chunks)
+
+
+def json_body(schema, partial=False, max_size=None):
+    """Parse and validate the JSON body of a request before calling the handler
+
+    The handler receives the validated values as its payload keyword
+    argument; a payload query parameter is dropped. Bodies over max_size
+    (default: the controller's MAX_BODY_SIZE) get a 413 without being read
+    past the limit, malformed or invalid ones a 400.
+    The body may wrap the values in a "params" object. OPTIONS requests are
+    passed through untouched. Apply it below @instrumented.
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(self, *args, **kw):
+            httprequest = request.httprequest
+            if httprequest.method == 'OPTIONS':
+                return endpoint(self, *args, **kw)
+
+            limit = max_size or self.MAX_BODY_SIZE
+            too_large = {
+                'success': False,
+                'message': f'Request body is larger than {limit} bytes'
+            }
+            if httprequest.content_length and httprequest.content_length > limit:
+                return self._json_response(too_large, status=413)
+            # Bodies without Content-Length (chunked) stop being read past the limit
+            raw_body = _read_body(httprequest, limit)
+            if len(raw_body) > limit:
+                return self._json_response(too_large, status=413)
+            if not raw_body:
+                return self._json_response({
+                    'success': False,
+                    'message': 'Request body must be JSON'
+                }, status=400)
+
+            try:
+                data = loads(raw_body)
+            except ValueError as e:
+                return self._json_response({
+                    'success': False,
+                    'message': f'Invalid JSON format: {str(e)}'
+                }, status=400)
+
+            params = data.get('params', data) if isinstance(data, dict) else data
+            try:
+                payload = validate(schema, params, partial=partial)
+            except ValueError as e:
+                return self._json_response({
+                    'success': False,
+                    'message': str(e)
+                }, status=400)
+            kw.pop('payload', None)
+            return endpoint(self, *args, payload=payload, **kw)
+
+        return wrapper
+
+    return decorator
@@ -1,97 +1,144 @@
 # -*- coding: utf-8 -*-
 
-from odoo import http
+from odoo import fields, http
 from odoo.http import request, Response
+from datetime import datetime, timezone
+from werkzeug.http import http_date
+import base64
+import hashlib
 import json
 import logging
+import time
+
+from .code_index import SectionCodeIndex
+from .metrics import add_encode_time, instrumented, route_metrics
+from .preflight import CORS_HEADERS
+from .rate_limit import rate_limited
+from .replica import readonly_cursor
+from .response_cache import ResponseCache
+from .schemas import (BULK_SCHEMA, MACHINE_SCHEMA, MACHINE_UPDATE_SCHEMA, SECTION_SCHEMA,
+                      SECTION_UPDATE_SCHEMA, json_body, validate)
+from .serializers import RecordEncoder, compress, content_codings, dumps, msgpack, packb
 
 _logger = logging.getLogger(__name__)
 
+# Serialized GET responses of this worker process, see ResponseCache
+response_cache = ResponseCache()
+
+# Section business key -> id map of this worker process, see SectionCodeIndex
+section_code_index = SectionCodeIndex()
+
+# Serialized /api/sections/stats responses of this worker process; they
+# expire after ttl seconds instead of following the cache generation, so
+# dashboards refreshing during a burst of writes still hit the cache
+stats_cache = ResponseCache(max_entries=16, ttl=10)
+
 class SectionsMachinesAPI(http.Controller):
 
+    # Keyset pagination bounds for the list endpoints
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+
+    # Request body size limits, in bytes
+    MAX_BODY_SIZE = 64 * 1024
+    MAX_BULK_BODY_SIZE = 16 * 1024 * 1024
+
+    # Upper bound on operations applied by the bulk endpoints within the
+    # request; larger batches (up to MAX_ASYNC_BULK_OPERATIONS) are queued
+    MAX_BULK_OPERATIONS = 5000
+    MAX_ASYNC_BULK_OPERATIONS = 100000
+
+    # Bodies smaller than this are not worth compressing
+    COMPRESSION_MIN_SIZE = 1024
+
+    # Request header an update may carry the record version in, instead of
+    # the version body field
+    VERSION_HEADER = 'X-Record-Version'
+
+    # Representations vary with these request headers
+    VARY = 'Accept, Accept-Encoding'
+
+    # Rows fetched from the server-side cursor per /api/export chunk
+    EXPORT_BATCH_SIZE = 1000
+
+    # Fields exposed by the API, in output order ('fields=' may select a subset)
+    SECTION_FIELDS = ('id', 'name', 'section_id', 'location', 'created_at', 'updated_at', 'version', 'machine_count')
+    MACHINE_FIELDS = ('id', 'name', 'section_id', 'section_name', 'section_location', 'created_at', 'updated_at',
+                      'version')
+
+    # Fields of /api/sections/stats entries
+    STATS_FIELDS = ('id', 'name', 'section_id', 'location', 'active_machines', 'archived_machines',
+                    'machines_changed_24h', 'last_change')
+
+    # Machine fields copied from their section, and their name in the
+    # sections table of columnar machine listings
+    MACHINE_SECTION_COLUMNS = {'section_name': 'name', 'section_location': 'location'}
+
+    # Encoders building API dictionaries from search_read rows
+    SECTION_ENCODER = RecordEncoder(SECTION_FIELDS, datetime_fields=('created_at', 'updated_at'))
+    MACHINE_ENCODER = RecordEncoder(MACHINE_FIELDS, datetime_fields=('created_at', 'updated_at'))
+    STATS_ENCODER = RecordEncoder(STATS_FIELDS, datetime_fields=('last_change',))
+
     def _cors_headers(self):
         """CORS headers to allow Flutter Web app to access the API"""
-        return {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-        }
+        return dict(CORS_HEADERS)
     
-    def _json_response(self, data, status=200):
-        """Return JSON response with CORS headers"""
+    def _json_response(self, data, status=200, headers=None):
+        """Return JSON response with CORS headers
+
+        The body is MessagePack instead when the client asks for
+        application/msgpack (and msgpack is installed), and is compressed
+        when it reaches COMPRESSION_MIN_SIZE and the client accepts gzip or
+        brotli.
+        """
+        media_type, coding = self._negotiate()
+        start = time.perf_counter()
+        if media_type == 'application/msgpack':
+            body = packb(data)
+            content_type = media_type
+        else:
+            body = dumps(data)
+            content_type = 'application/json; charset=utf-8'
+        response_headers = self._cors_headers()
+        response_headers['Vary'] = self.VARY
+        if coding and len(body) >= self.COMPRESSION_MIN_SIZE:
+            body = compress(body, coding)
+            response_headers['Content-Encoding'] = coding
+        add_encode_time(time.perf_counter() - start)
+        response_headers.update(headers or {})
         return Response(
-            json.dumps(data, ensure_ascii=False),
-            content_type='application/json; charset=utf-8',
+            body,
+            content_type=content_type,
             status=status,
-            headers=self._cors_headers()
+            headers=response_headers
         )
 
+    def _negotiate(self):
+        """Return the (media type, content coding or None) to answer the current request with"""
+        httprequest = request.httprequest
+        media_type = 'application/json'
+        if msgpack is not None and httprequest.accept_mimetypes.best_match(
+                ('application/json', 'application/msgpack')) == 'application/msgpack':
+            media_type = 'application/msgpack'
+        return media_type, httprequest.accept_encodings.best_match(content_codings())
+
     # ==================== SECTIONS API ====================
 
     @http.route('/api/sections/create', type='http', auth='public', methods=['POST', 'OPTIONS'], csrf=False)
-    def create_section(self, **kw):
+    @instrumented
+    @rate_limited('write')
+    @json_body(SECTION_SCHEMA)
+    def create_section(self, payload=None, **kw):
         """Create a new section"""
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
-            # Get request data
-            raw_body = request.httprequest.data
-            if not raw_body:
-                raw_body = request.httprequest.get_data()
-            
-            if not raw_body:
-                return self._json_response({
-                    'success': False,
-                    'message': 'Request body must be JSON'
-                }, status=400)
-            
-            # Decode bytes to string
-            if isinstance(raw_body, bytes):
-                raw_body = raw_body.decode('utf-8')
-            
-            # Parse JSON
-            try:
-                data = json.loads(raw_body)
-            except json.JSONDecodeError as e:
-                _logger.error(f"JSON decode error: {e}, raw_body: {raw_body}")
-                return self._json_response({
-                    'success': False,
-                    'message': f'Invalid JSON format: {str(e)}'
-                }, status=400)
+            _logger.debug("Creating section with params: %s", payload)
             
-            # Get params (support both formats)
-            params = data.get('params', data)
+            section = request.env['kiosk.section'].sudo().create(payload)
             
-            _logger.info(f"Creating section with params: {params}")
-            
-            # Validate required fields
-            if not params.get('name'):
-                return self._json_response({
-                    'success': False,
-                    'message': 'name is required'
-                }, status=400)
-            
-            if not params.get('section_id'):
-                return self._json_response({
-                    'success': False,
-                    'message': 'section_id is required'
-                }, status=400)
-            
-            if not params.get('location'):
-                return self._json_response({
-                    'success': False,
-                    'message': 'location is required'
-                }, status=400)
-            
-            # Create section
-            section = request.env['kiosk.section'].sudo().create({
-                'name': params.get('name'),
-                'section_id': params.get('section_id'),
-                'location': params.get('location'),
-            })
-            
-            _logger.info(f"Section created successfully with ID: {section.id}")
+            _logger.info("Section created successfully with ID: %s", section.id)
             
             return self._json_response({
                 'success': True,
@@ -99,29 +146,58 @@ class SectionsMachinesAPI(http.Controller):
                 'section': self._section_to_dict(section)
             })
         except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            _logger.error(f"Error creating section: {str(e)}\n{error_trace}")
+            _logger.error(f"Error creating section: {e}", exc_info=True)
             return self._json_response({
                 'success': False,
                 'message': str(e),
                 'error_type': type(e).__name__
             }, status=500)
 
-    @http.route('/api/sections/list', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False)
+    @http.route('/api/sections/list', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
     def list_sections(self, **kw):
-        """List all active sections"""
+        """List active sections, one keyset page at a time
+
+        Query parameters:
+        - limit: page size (default DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE)
+        - after: cursor returned as next_cursor by the previous page
+        - fields: comma separated subset of SECTION_FIELDS
+        - format: records (default) or columnar, see _parse_format
+        """
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
-            sections = request.env['kiosk.section'].sudo().search([('active', '=', True)])
-            sections_list = [self._section_to_dict(s) for s in sections]
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
             
-            return self._json_response({
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
+            
+            fields_list, limit, after = self._parse_page_params(kw, self.SECTION_FIELDS)
+            columnar = self._parse_format(kw)
+            rows, next_cursor = self._read_page('kiosk.section', [('active', '=', True)], fields_list, limit, after)
+            
+            if 'machine_count' in fields_list:
+                counts = self._active_machine_counts([row['id'] for row in rows])
+                for row in rows:
+                    row['machine_count'] = counts.get(row['id'], 0)
+            
+            return self._response_cache_store(cache_token, validators, self._json_response({
                 'success': True,
-                'sections': sections_list
-            })
+                'sections': (self.SECTION_ENCODER.encode_columns(rows, fields_list) if columnar
+                             else self.SECTION_ENCODER.encode(rows, fields_list)),
+                'next_cursor': next_cursor,
+            }, headers=self._validator_headers(validators)))
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
         except Exception as e:
             _logger.error(f"Error listing sections: {e}", exc_info=True)
             return self._json_response({
@@ -129,13 +205,87 @@ class SectionsMachinesAPI(http.Controller):
                 'message': str(e)
             }, status=500)
 
-    @http.route('/api/sections/get/<int:section_id>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False)
+    @http.route('/api/sections/get', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def get_sections(self, **kw):
+        """Get many sections by ID
+
+        Query parameters:
+        - ids: comma separated section ids
+        - include: "machines" to embed the active machines of each section
+
+        Sections are returned in the requested order; unknown or archived
+        ids are listed in missing.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
+            
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
+            
+            ids = self._parse_ids(kw, 'ids', required=True)
+            include = self._parse_include(kw)
+            rows, missing = self._read_ids('kiosk.section', ids, self.SECTION_FIELDS)
+            found_ids = [row['id'] for row in rows]
+            counts = self._active_machine_counts(found_ids)
+            for row in rows:
+                row['machine_count'] = counts.get(row['id'], 0)
+            sections = self.SECTION_ENCODER.encode(rows)
+            
+            if 'machines' in include:
+                machines_by_section = {section_id: [] for section_id in found_ids}
+                machine_rows = request.env['section.machine'].sudo().search_read([
+                    ('section_id', 'in', found_ids),
+                    ('active', '=', True),
+                ], self._stored_fields('section.machine', self.MACHINE_FIELDS), order='name, id', load=None)
+                for machine in self.MACHINE_ENCODER.encode(machine_rows):
+                    machines_by_section[machine['section_id']].append(machine)
+                for section in sections:
+                    section['machines'] = machines_by_section[section['id']]
+            
+            return self._response_cache_store(cache_token, validators, self._json_response({
+                'success': True,
+                'sections': sections,
+                'missing': missing,
+            }, headers=self._validator_headers(validators)))
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error getting sections: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    @http.route('/api/sections/get/<int:section_id>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
     def get_section(self, section_id, **kw):
         """Get specific section by ID"""
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
+            
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
+            
             section = request.env['kiosk.section'].sudo().browse(section_id)
             if not section.exists() or not section.active:
                 return self._json_response({
@@ -143,10 +293,10 @@ class SectionsMachinesAPI(http.Controller):
                     'message': 'Section not found'
                 }, status=404)
             
-            return self._json_response({
+            return self._response_cache_store(cache_token, validators, self._json_response({
                 'success': True,
                 'section': self._section_to_dict(section)
-            })
+            }, headers=self._validator_headers(validators)))
         except Exception as e:
             _logger.error(f"Error getting section: {e}", exc_info=True)
             return self._json_response({
@@ -154,49 +304,210 @@ class SectionsMachinesAPI(http.Controller):
                 'message': str(e)
             }, status=500)
 
-    @http.route('/api/sections/update/<int:section_id>', type='http', auth='public', methods=['PUT', 'OPTIONS'], csrf=False)
-    def update_section(self, section_id, **kw):
-        """Update a section"""
+    @http.route('/api/sections/by_code/<string:code>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def get_section_by_code(self, code, **kw):
+        """Get a section and its machines by business key (the section_id field)
+
+        format=columnar returns the machines in columnar form.
+        """
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
-            raw_body = request.httprequest.data or request.httprequest.get_data()
-            if isinstance(raw_body, bytes):
-                raw_body = raw_body.decode('utf-8')
-            
-            if not raw_body:
-                return self._json_response({
-                    'success': False,
-                    'message': 'Request body must be JSON'
-                }, status=400)
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
             
-            data = json.loads(raw_body)
-            params = data.get('params', data)
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
             
+            # The index may lag behind an archive: check the section itself
+            section_id = section_code_index.resolve(request.env, [code])[code]
             section = request.env['kiosk.section'].sudo().browse(section_id)
-            
-            if not section.exists() or not section.active:
+            if not section_id or not section.exists() or not section.active:
                 return self._json_response({
                     'success': False,
                     'message': 'Section not found'
                 }, status=404)
             
-            update_vals = {}
-            if 'name' in params:
-                update_vals['name'] = params.get('name')
-            if 'section_id' in params:
-                update_vals['section_id'] = params.get('section_id')
-            if 'location' in params:
-                update_vals['location'] = params.get('location')
+            return self._response_cache_store(cache_token, validators, self._json_response({
+                'success': True,
+                'section': self._section_to_dict(section),
+                'machines': self._section_machines(section_id, self._parse_format(kw))
+            }, headers=self._validator_headers(validators)))
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error getting section by code: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    @http.route('/api/sections/by_code', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def get_sections_by_codes(self, **kw):
+        """Get many sections by business key
+
+        Query parameters:
+        - codes: comma separated section_id values
+
+        Sections are returned in the requested order; unknown codes are
+        listed in missing.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
+            
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
             
-            section.write(update_vals)
+            codes = list(dict.fromkeys(code.strip() for code in (kw.get('codes') or '').split(',') if code.strip()))
+            if not codes:
+                raise ValueError('codes is required')
+            if len(codes) > self.MAX_PAGE_SIZE:
+                raise ValueError(f'At most {self.MAX_PAGE_SIZE} codes are allowed per request')
             
+            # Only active sections are read, in case the index lags behind an archive
+            resolved = section_code_index.resolve(request.env, codes)
+            rows, archived_ids = self._read_ids(
+                'kiosk.section', [resolved[code] for code in codes if resolved[code]], self.SECTION_FIELDS)
+            counts = self._active_machine_counts([row['id'] for row in rows])
+            for row in rows:
+                row['machine_count'] = counts.get(row['id'], 0)
+            
+            return self._response_cache_store(cache_token, validators, self._json_response({
+                'success': True,
+                'sections': self.SECTION_ENCODER.encode(rows),
+                'missing': [code for code in codes if not resolved[code] or resolved[code] in archived_ids],
+            }, headers=self._validator_headers(validators)))
+        except ValueError as e:
             return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error getting sections by code: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    @http.route('/api/sections/stats', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def section_stats(self, **kw):
+        """Machine counts and recent activity of every active section, for dashboards
+
+        Query parameters:
+        - format: records (default) or columnar, see _parse_format
+
+        Each section comes with active_machines, archived_machines,
+        machines_changed_24h (machines created, written or archived in the
+        last 24 hours) and last_change (latest updated_at of the section and
+        its machines). Everything is computed by one aggregate query, and
+        each worker reuses a response for stats_cache.ttl seconds.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            columnar = self._parse_format(kw)
+            key = (request.db, request.httprequest.full_path) + self._negotiate()
+            cached = stats_cache.get(key, 0)
+            if cached:
+                body, headers = cached
+                return Response(body, status=200, headers=headers)
+            
+            rows = self._section_stats()
+            response = self._json_response({
+                'success': True,
+                'sections': (self.STATS_ENCODER.encode_columns(rows) if columnar
+                             else self.STATS_ENCODER.encode(rows)),
+                'totals': {
+                    name: sum(row[name] for row in rows)
+                    for name in ('active_machines', 'archived_machines', 'machines_changed_24h')
+                },
+                'generated_at': fields.Datetime.now(),
+            }, headers={'Cache-Control': f'max-age={stats_cache.ttl}'})
+            body = response.get_data()
+            stats_cache.set(key, 0, (body, dict(response.headers)), size=len(body))
+            return response
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error computing section stats: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    @http.route('/api/sections/update/<int:section_id>', type='http', auth='public', methods=['PUT', 'OPTIONS'], csrf=False)
+    @instrumented
+    @rate_limited('write')
+    @json_body(SECTION_UPDATE_SCHEMA, partial=True)
+    def update_section(self, section_id, payload=None, **kw):
+        """Update a section
+
+        With a version in the body (or an X-Record-Version header) holding
+        the version the client last read, the update only applies if the
+        section is still at that version and answers 409 otherwise.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            version = self._expected_version(payload)
+            if version is None:
+                section = request.env['kiosk.section'].sudo().browse(section_id)
+                if not section.exists() or not section.active:
+                    return self._json_response({
+                        'success': False,
+                        'message': 'Section not found'
+                    }, status=404)
+                section.write(payload)
+            else:
+                section, current_version = request.env['kiosk.section'].sudo()._write_if_version(
+                    section_id, version, payload)
+                if not section:
+                    return self._version_failure_response('Section', current_version)
+            
+            data = {
                 'success': True,
                 'message': 'Section updated successfully',
                 'section': self._section_to_dict(section)
-            })
+            }
+            # Sections with many machines hand the copy of name/location to a job
+            job = request.env['kiosk.api.job'].sudo().search([
+                ('kind', '=', 'section_propagation'),
+                ('section_id', '=', section.id),
+                ('state', 'in', ('pending', 'running')),
+            ], limit=1) if {'name', 'location'} & set(payload) else None
+            if job:
+                data['propagation_job'] = self._job_to_dict(job)
+            return self._json_response(data)
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
         except Exception as e:
             _logger.error(f"Error updating section: {e}", exc_info=True)
             return self._json_response({
@@ -205,6 +516,8 @@ class SectionsMachinesAPI(http.Controller):
             }, status=500)
 
     @http.route('/api/sections/delete/<int:section_id>', type='http', auth='public', methods=['DELETE', 'OPTIONS'], csrf=False)
+    @instrumented
+    @rate_limited('write')
     def delete_section(self, section_id, **kw):
         """Delete a section (soft delete)"""
         if request.httprequest.method == 'OPTIONS':
@@ -231,49 +544,61 @@ class SectionsMachinesAPI(http.Controller):
                 'message': str(e)
             }, status=500)
 
+    @http.route('/api/sections/bulk', type='http', auth='public', methods=['POST', 'OPTIONS'], csrf=False)
+    @instrumented
+    @rate_limited('write')
+    @json_body(BULK_SCHEMA, max_size=MAX_BULK_BODY_SIZE)
+    def bulk_sections(self, payload=None, **kw):
+        """Create, update and archive many sections in one request
+
+        Body: {"operations": [{"op": "create", "values": {...}},
+                              {"op": "update", "id": <id>, "values": {...}},
+                              {"op": "archive", "id": <id>}]}
+        The response holds one result per operation, in request order. With
+        async=1, or more than MAX_BULK_OPERATIONS operations, the operations
+        are queued as a background job and a 202 with the job is returned.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            items, results = self._parse_bulk_items(payload['operations'], SECTION_SCHEMA, kw)
+            return self._bulk_response('kiosk.section', items, results, kw)
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error in bulk sections: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
     # ==================== MACHINES API ====================
 
     @http.route('/api/machines/create', type='http', auth='public', methods=['POST', 'OPTIONS'], csrf=False)
-    def create_machine(self, **kw):
+    @instrumented
+    @rate_limited('write')
+    @json_body(MACHINE_SCHEMA)
+    def create_machine(self, payload=None, **kw):
         """Create a new machine (requires section_id)"""
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
-            raw_body = request.httprequest.data or request.httprequest.get_data()
-            if isinstance(raw_body, bytes):
-                raw_body = raw_body.decode('utf-8')
-            
-            if not raw_body:
-                return self._json_response({
-                    'success': False,
-                    'message': 'Request body must be JSON'
-                }, status=400)
-            
-            data = json.loads(raw_body)
-            params = data.get('params', data)
-            
-            section_id = params.get('section_id')
-            if not section_id:
-                return self._json_response({
-                    'success': False,
-                    'message': 'section_id is required'
-                }, status=400)
-            
             # Check if section exists
-            section = request.env['kiosk.section'].sudo().browse(int(section_id))
+            section = request.env['kiosk.section'].sudo().browse(payload['section_id'])
             if not section.exists() or not section.active:
                 return self._json_response({
                     'success': False,
                     'message': 'Section not found'
                 }, status=404)
             
-            _logger.info(f"Creating machine: {params}")
+            _logger.debug("Creating machine: %s", payload)
             
-            machine = request.env['section.machine'].sudo().create({
-                'name': params.get('name'),
-                'section_id': int(section_id),
-            })
+            machine = request.env['section.machine'].sudo().create(payload)
             
             return self._json_response({
                 'success': True,
@@ -287,20 +612,50 @@ class SectionsMachinesAPI(http.Controller):
                 'message': str(e)
             }, status=500)
 
-    @http.route('/api/machines/list', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False)
+    @http.route('/api/machines/list', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
     def list_machines(self, **kw):
-        """List all active machines"""
+        """List active machines, one keyset page at a time
+
+        Query parameters:
+        - limit: page size (default DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE)
+        - after: cursor returned as next_cursor by the previous page
+        - fields: comma separated subset of MACHINE_FIELDS
+        - format: records (default) or columnar, see _parse_format
+        """
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
-            machines = request.env['section.machine'].sudo().search([('active', '=', True)])
-            machines_list = [self._machine_to_dict(m) for m in machines]
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
+            
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
+            
+            fields_list, limit, after = self._parse_page_params(kw, self.MACHINE_FIELDS)
+            columnar = self._parse_format(kw)
+            rows, next_cursor = self._read_page('section.machine', [('active', '=', True)], fields_list, limit, after)
             
+            data = {'success': True}
+            if columnar:
+                data['machines'], sections = self._machine_columns(rows, fields_list)
+                if sections:
+                    data['sections'] = sections
+            else:
+                data['machines'] = self.MACHINE_ENCODER.encode(rows, fields_list)
+            data['next_cursor'] = next_cursor
+            return self._response_cache_store(cache_token, validators, self._json_response(
+                data, headers=self._validator_headers(validators)))
+        except ValueError as e:
             return self._json_response({
-                'success': True,
-                'machines': machines_list
-            })
+                'success': False,
+                'message': str(e)
+            }, status=400)
         except Exception as e:
             _logger.error(f"Error listing machines: {e}", exc_info=True)
             return self._json_response({
@@ -308,13 +663,69 @@ class SectionsMachinesAPI(http.Controller):
                 'message': str(e)
             }, status=500)
 
-    @http.route('/api/machines/get/<int:machine_id>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False)
+    @http.route('/api/machines/get', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def get_machines(self, **kw):
+        """Get many machines by ID
+
+        Query parameters:
+        - ids: comma separated machine ids
+
+        Machines are returned in the requested order; unknown or archived
+        ids are listed in missing.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
+            
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
+            
+            ids = self._parse_ids(kw, 'ids', required=True)
+            rows, missing = self._read_ids('section.machine', ids, self.MACHINE_FIELDS)
+            
+            return self._response_cache_store(cache_token, validators, self._json_response({
+                'success': True,
+                'machines': self.MACHINE_ENCODER.encode(rows),
+                'missing': missing,
+            }, headers=self._validator_headers(validators)))
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error getting machines: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    @http.route('/api/machines/get/<int:machine_id>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
     def get_machine(self, machine_id, **kw):
         """Get specific machine by ID"""
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
+            
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
+            
             machine = request.env['section.machine'].sudo().browse(machine_id)
             if not machine.exists() or not machine.active:
                 return self._json_response({
@@ -322,10 +733,10 @@ class SectionsMachinesAPI(http.Controller):
                     'message': 'Machine not found'
                 }, status=404)
             
-            return self._json_response({
+            return self._response_cache_store(cache_token, validators, self._json_response({
                 'success': True,
                 'machine': self._machine_to_dict(machine)
-            })
+            }, headers=self._validator_headers(validators)))
         except Exception as e:
             _logger.error(f"Error getting machine: {e}", exc_info=True)
             return self._json_response({
@@ -333,13 +744,27 @@ class SectionsMachinesAPI(http.Controller):
                 'message': str(e)
             }, status=500)
 
-    @http.route('/api/machines/by_section/<int:section_id>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False)
+    @http.route('/api/machines/by_section/<int:section_id>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
     def get_machines_by_section(self, section_id, **kw):
-        """Get all machines for a specific section"""
+        """Get all machines for a specific section
+
+        format=columnar returns the machines in columnar form.
+        """
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
+            cache_token, cached = self._response_cache_lookup()
+            if cached:
+                return cached
+            
+            validators = self._cache_validators()
+            not_modified = self._not_modified_response(validators)
+            if not_modified:
+                return not_modified
+            
             section = request.env['kiosk.section'].sudo().browse(section_id)
             if not section.exists() or not section.active:
                 return self._json_response({
@@ -347,17 +772,16 @@ class SectionsMachinesAPI(http.Controller):
                     'message': 'Section not found'
                 }, status=404)
             
-            machines = request.env['section.machine'].sudo().search([
-                ('section_id', '=', section_id),
-                ('active', '=', True)
-            ])
-            machines_list = [self._machine_to_dict(m) for m in machines]
-            
-            return self._json_response({
+            return self._response_cache_store(cache_token, validators, self._json_response({
                 'success': True,
                 'section': self._section_to_dict(section),
-                'machines': machines_list
-            })
+                'machines': self._section_machines(section_id, self._parse_format(kw))
+            }, headers=self._validator_headers(validators)))
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
         except Exception as e:
             _logger.error(f"Error getting machines by section: {e}", exc_info=True)
             return self._json_response({
@@ -366,54 +790,56 @@ class SectionsMachinesAPI(http.Controller):
             }, status=500)
 
     @http.route('/api/machines/update/<int:machine_id>', type='http', auth='public', methods=['PUT', 'OPTIONS'], csrf=False)
-    def update_machine(self, machine_id, **kw):
-        """Update a machine"""
+    @instrumented
+    @rate_limited('write')
+    @json_body(MACHINE_UPDATE_SCHEMA, partial=True)
+    def update_machine(self, machine_id, payload=None, **kw):
+        """Update a machine
+
+        With a version in the body (or an X-Record-Version header) holding
+        the version the client last read, the update only applies if the
+        machine is still at that version and answers 409 otherwise.
+        """
         if request.httprequest.method == 'OPTIONS':
             return Response(status=200, headers=self._cors_headers())
         
         try:
-            raw_body = request.httprequest.data or request.httprequest.get_data()
-            if isinstance(raw_body, bytes):
-                raw_body = raw_body.decode('utf-8')
-            
-            if not raw_body:
-                return self._json_response({
-                    'success': False,
-                    'message': 'Request body must be JSON'
-                }, status=400)
-            
-            data = json.loads(raw_body)
-            params = data.get('params', data)
-            
-            machine = request.env['section.machine'].sudo().browse(machine_id)
-            
-            if not machine.exists() or not machine.active:
-                return self._json_response({
-                    'success': False,
-                    'message': 'Machine not found'
-                }, status=404)
+            version = self._expected_version(payload)
+            if version is None:
+                machine = request.env['section.machine'].sudo().browse(machine_id)
+                if not machine.exists() or not machine.active:
+                    return self._json_response({
+                        'success': False,
+                        'message': 'Machine not found'
+                    }, status=404)
             
-            update_vals = {}
-            if 'name' in params:
-                update_vals['name'] = params.get('name')
-            if 'section_id' in params:
-                section_id = params.get('section_id')
+            if 'section_id' in payload:
                 # Check if section exists
-                section = request.env['kiosk.section'].sudo().browse(int(section_id))
+                section = request.env['kiosk.section'].sudo().browse(payload['section_id'])
                 if not section.exists() or not section.active:
                     return self._json_response({
                         'success': False,
                         'message': 'Section not found'
                     }, status=404)
-                update_vals['section_id'] = int(section_id)
             
-            machine.write(update_vals)
+            if version is None:
+                machine.write(payload)
+            else:
+                machine, current_version = request.env['section.machine'].sudo()._write_if_version(
+                    machine_id, version, payload)
+                if not machine:
+                    return self._version_failure_response('Machine', current_version)
             
             return self._json_response({
                 'success': True,
                 'message': 'Machine updated successfully',
                 'machine': self._machine_to_dict(machine)
             })
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
         except Exception as e:
             _logger.error(f"Error updating machine: {e}", exc_info=True)
             return self._json_response({
@@ -422,6 +848,8 @@ class SectionsMachinesAPI(http.Controller):
             }, status=500)
 
     @http.route('/api/machines/delete/<int:machine_id>', type='http', auth='public', methods=['DELETE', 'OPTIONS'], csrf=False)
+    @instrumented
+    @rate_limited('write')
     def delete_machine(self, machine_id, **kw):
         """Delete a machine (soft delete)"""
         if request.httprequest.method == 'OPTIONS':
@@ -448,29 +876,774 @@ class SectionsMachinesAPI(http.Controller):
                 'message': str(e)
             }, status=500)
 
+    @http.route('/api/machines/bulk', type='http', auth='public', methods=['POST', 'OPTIONS'], csrf=False)
+    @instrumented
+    @rate_limited('write')
+    @json_body(BULK_SCHEMA, max_size=MAX_BULK_BODY_SIZE)
+    def bulk_machines(self, payload=None, **kw):
+        """Create, update and archive many machines in one request
+
+        Body: {"operations": [{"op": "create", "values": {...}},
+                              {"op": "update", "id": <id>, "values": {...}},
+                              {"op": "archive", "id": <id>}]}
+        The response holds one result per operation, in request order. With
+        async=1, or more than MAX_BULK_OPERATIONS operations, the operations
+        are queued as a background job and a 202 with the job is returned.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            items, results = self._parse_bulk_items(payload['operations'], MACHINE_SCHEMA, kw)
+            return self._bulk_response('section.machine', items, results, kw)
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error in bulk machines: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    @http.route('/api/cache/stats', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def cache_stats(self, **kw):
+        """Return the response cache counters of the worker serving the request"""
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        return self._json_response({
+            'success': True,
+            'cache': response_cache.stats(),
+        })
+
+    @http.route('/api/metrics', type='http', auth='public', methods=['GET'], csrf=False, readonly=readonly_cursor)
+    def metrics(self, **kw):
+        """Expose per-route request metrics of this worker in Prometheus text format"""
+        cache = response_cache.stats()
+        extra_lines = [
+            '# HELP kiosk_api_response_cache_events_total Response cache lookups and removals.',
+            '# TYPE kiosk_api_response_cache_events_total counter',
+        ]
+        for event in ('hits', 'misses', 'evictions', 'invalidations', 'rejections'):
+            extra_lines.append(f'kiosk_api_response_cache_events_total{{event="{event}"}} {cache[event]}')
+        extra_lines += [
+            '# HELP kiosk_api_response_cache_entries Entries held by the response cache.',
+            '# TYPE kiosk_api_response_cache_entries gauge',
+            f"kiosk_api_response_cache_entries {cache['size']}",
+            '# HELP kiosk_api_response_cache_bytes Bytes of response bodies held by the response cache.',
+            '# TYPE kiosk_api_response_cache_bytes gauge',
+            f"kiosk_api_response_cache_bytes {cache['bytes']}",
+        ]
+        return Response(
+            route_metrics.render(extra_lines),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+            status=200,
+        )
+
+    # ==================== JOBS API ====================
+
+    @http.route('/api/jobs/<int:job_id>', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def get_job(self, job_id, **kw):
+        """Get the progress of a background job, with its results once a bulk job is done"""
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            job = request.env['kiosk.api.job'].sudo().browse(job_id)
+            if not job.exists():
+                return self._json_response({
+                    'success': False,
+                    'message': 'Job not found'
+                }, status=404)
+            
+            return self._json_response({
+                'success': True,
+                'job': self._job_to_dict(job, with_results=True)
+            })
+        except Exception as e:
+            _logger.error(f"Error getting job: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    # ==================== NOTIFICATIONS API ====================
+
+    @http.route('/api/bus/channels', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def bus_channels(self, **kw):
+        """Hand out the bus channels announcing section and machine changes
+
+        Query parameters:
+        - section_ids: comma separated section ids; without it only the
+          global channel is returned
+
+        Clients subscribe to the returned channels through Odoo's websocket
+        (/websocket) starting after last_id, and receive notifications of
+        type notification_type listing the changed section and machine ids
+        (or {"resync": true} for large changes).
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            section_ids = self._parse_ids(kw, 'section_ids')
+            
+            ApiBus = request.env['kiosk.api.bus'].sudo()
+            active_ids = set(request.env['kiosk.section'].sudo().search([
+                ('id', 'in', section_ids),
+                ('active', '=', True),
+            ]).ids) if section_ids else set()
+            
+            return self._json_response({
+                'success': True,
+                'channels': [ApiBus._channel] + [
+                    ApiBus._section_channel(section_id) for section_id in section_ids if section_id in active_ids
+                ],
+                'missing': [section_id for section_id in section_ids if section_id not in active_ids],
+                'notification_type': ApiBus._notification_type,
+                'last_id': request.env['bus.bus'].sudo()._bus_last_id(),
+                'websocket': '/websocket',
+            })
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error getting bus channels: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    # ==================== SYNC API ====================
+
+    @http.route('/api/sync', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def sync(self, **kw):
+        """Return sections and machines changed since a sync token
+
+        Query parameters:
+        - since: next_token of a previous sync, or a UTC timestamp; omit it
+          to receive every active record
+        - limit: maximum number of sections and of machines per page
+
+        Archived records are returned as tombstones in deleted_sections and
+        deleted_machines. Keep calling with next_token while has_more is true.
+        Changes are paged in the order of the transactions that made them,
+        see _sync_horizon.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        try:
+            limit = self._parse_limit(kw.get('limit'))
+            since = kw.get('since')
+            state = self._decode_sync_token(since) if since else {}
+            changed_since = state.get('changed_since')
+            horizon = self._sync_horizon()
+            
+            section_rows, section_pos, sections_more = self._read_changes(
+                'kiosk.section', self.SECTION_FIELDS, state.get('sections'), horizon, limit, changed_since)
+            machine_rows, machine_pos, machines_more = self._read_changes(
+                'section.machine', self.MACHINE_FIELDS, state.get('machines'), horizon, limit, changed_since)
+            next_state = {'sections': section_pos, 'machines': machine_pos}
+            if changed_since:
+                next_state['changed_since'] = changed_since
+            
+            active_sections = [row for row in section_rows if row['active']]
+            counts = self._active_machine_counts([row['id'] for row in active_sections])
+            for row in active_sections:
+                row['machine_count'] = counts.get(row['id'], 0)
+            
+            return self._json_response({
+                'success': True,
+                'sections': self.SECTION_ENCODER.encode(active_sections),
+                'machines': self.MACHINE_ENCODER.encode([row for row in machine_rows if row['active']]),
+                'deleted_sections': [row['id'] for row in section_rows if not row['active']],
+                'deleted_machines': [row['id'] for row in machine_rows if not row['active']],
+                'next_token': self._encode_sync_token(next_state),
+                'has_more': sections_more or machines_more,
+            })
+        except ValueError as e:
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+        except Exception as e:
+            _logger.error(f"Error syncing: {e}", exc_info=True)
+            return self._json_response({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
+    # ==================== EXPORT API ====================
+
+    @http.route('/api/export', type='http', auth='public', methods=['GET', 'OPTIONS'], csrf=False, readonly=readonly_cursor)
+    @instrumented
+    @rate_limited('read')
+    def export(self, **kw):
+        """Stream every active section followed by its active machines as NDJSON
+
+        Each line is a JSON object with a "type" key ("section" or "machine").
+        Rows are read through a server-side cursor in EXPORT_BATCH_SIZE
+        batches and each batch is sent as soon as it is encoded, so memory use
+        does not depend on the number of records.
+        """
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=self._cors_headers())
+        
+        registry = request.env.registry
+        return Response(
+            self._export_lines(registry, readonly=readonly_cursor()),
+            content_type='application/x-ndjson; charset=utf-8',
+            status=200,
+            headers=self._cors_headers(),
+            direct_passthrough=True,
+        )
+
     # ==================== HELPER METHODS ====================
 
     def _section_to_dict(self, section):
         """Convert section record to dictionary"""
-        return {
-            'id': section.id,
-            'name': section.name,
-            'section_id': section.section_id,
-            'location': section.location,
-            'created_at': section.created_at.isoformat() if section.created_at else None,
-            'updated_at': section.updated_at.isoformat() if section.updated_at else None,
-            'machine_count': len(section.machine_ids.filtered(lambda m: m.active)),
-        }
+        row = section.read(self._stored_fields('kiosk.section', self.SECTION_FIELDS), load=None)[0]
+        row['machine_count'] = self._active_machine_counts(section.ids).get(section.id, 0)
+        return self.SECTION_ENCODER.encode_one(row)
 
     def _machine_to_dict(self, machine):
-        """Convert machine record to dictionary"""
+        """Convert machine record to dictionary
+
+        Section name and location come from the columns copied from the
+        section, so the section table is never read.
+        """
+        row = machine.read(self._stored_fields('section.machine', self.MACHINE_FIELDS), load=None)[0]
+        return self.MACHINE_ENCODER.encode_one(row)
+
+    def _section_machines(self, section_id, columnar=False):
+        """Return the active machines of a section as dictionaries, with one query
+
+        In columnar form the section name and location are left out: the
+        section itself is part of every response listing its machines.
+        """
+        fields_list = self.MACHINE_FIELDS
+        if columnar:
+            fields_list = [name for name in fields_list if name not in ('section_name', 'section_location')]
+        rows = request.env['section.machine'].sudo().search_read([
+            ('section_id', '=', section_id),
+            ('active', '=', True)
+        ], self._stored_fields('section.machine', fields_list), load=None)
+        if columnar:
+            return self.MACHINE_ENCODER.encode_columns(rows, fields_list)
+        return self.MACHINE_ENCODER.encode(rows)
+
+    def _parse_format(self, kw):
+        """Whether the response is asked in columnar form (format=columnar)
+
+        Columnar listings hold one array per field instead of one object per
+        record. Machine listings also move section name and location to a
+        sections table with one entry per section, joined on section_id.
+        """
+        value = kw.get('format') or 'records'
+        if value not in ('records', 'columnar'):
+            raise ValueError('format must be records or columnar')
+        return value == 'columnar'
+
+    def _machine_columns(self, rows, fields_list):
+        """Return (machine columns, section columns or None) for format=columnar"""
+        return self.MACHINE_ENCODER.encode_joined_columns(
+            rows, 'section_id', self.MACHINE_SECTION_COLUMNS, fields_list)
+
+    def _parse_ids(self, kw, name, required=False):
+        """Parse a comma separated list of ids, without duplicates and in the given order"""
+        try:
+            ids = list(dict.fromkeys(int(value) for value in (kw.get(name) or '').split(',') if value.strip()))
+        except ValueError:
+            raise ValueError(f'{name} must be a comma separated list of integers')
+        if required and not ids:
+            raise ValueError(f'{name} is required')
+        if len(ids) > self.MAX_PAGE_SIZE:
+            raise ValueError(f'At most {self.MAX_PAGE_SIZE} {name} are allowed per request')
+        return ids
+
+    def _parse_include(self, kw):
+        """Parse the include parameter of the section endpoints into a set"""
+        include = {value.strip() for value in (kw.get('include') or '').split(',') if value.strip()}
+        if include - {'machines'}:
+            raise ValueError('include only accepts machines')
+        return include
+
+    def _read_ids(self, model_name, ids, fields_list):
+        """Read the active records of ids with one query
+
+        Returns the rows in the order of ids and the ids that were not found.
+        """
+        rows = request.env[model_name].sudo().search_read(
+            [('id', 'in', ids)], self._stored_fields(model_name, fields_list), load=None)
+        rows_by_id = {row['id']: row for row in rows}
+        found = [rows_by_id[record_id] for record_id in ids if record_id in rows_by_id]
+        missing = [record_id for record_id in ids if record_id not in rows_by_id]
+        return found, missing
+
+    def _stored_fields(self, model_name, fields_list):
+        """Return the fields of fields_list that are columns of the model"""
+        model_fields = request.env[model_name]._fields
+        return [name for name in fields_list if name in model_fields]
+
+    def _active_machine_counts(self, section_ids):
+        """Return {section id: number of active machines} for the given sections
+
+        Counts come from a single GROUP BY section_id query, so no machine
+        record is loaded whatever the size of the sections.
+        """
+        if not section_ids:
+            return {}
+        groups = request.env['section.machine'].sudo()._read_group(
+            [('section_id', 'in', list(section_ids)), ('active', '=', True)],
+            groupby=['section_id'],
+            aggregates=['__count'],
+        )
+        return {section.id: count for section, count in groups}
+
+    def _section_stats(self):
+        """Return the /api/sections/stats rows of all active sections, with one query
+
+        Machines are counted with FILTERed aggregates over a single join, so
+        the cost is one pass over section_machine whatever the number of
+        sections.
+        """
+        cr = request.env.cr
+        cr.execute("""
+            SELECT s.id, s.name, s.section_id, s.location,
+                   count(m.id) FILTER (WHERE m.active),
+                   count(m.id) FILTER (WHERE NOT m.active),
+                   count(m.id) FILTER (WHERE m.updated_at >= (now() AT TIME ZONE 'UTC') - interval '24 hours'),
+                   GREATEST(s.updated_at, max(m.updated_at))
+              FROM kiosk_section s
+         LEFT JOIN section_machine m ON m.section_id = s.id
+             WHERE s.active
+          GROUP BY s.id
+          ORDER BY s.name, s.id
+        """)
+        return [dict(zip(self.STATS_FIELDS, row)) for row in cr.fetchall()]
+
+    # ==================== VERSION HELPERS ====================
+
+    def _expected_version(self, payload):
+        """Return the version an update was made against, or None for a blind update
+
+        It is taken from the version body field, or else from the
+        VERSION_HEADER header. If-Match is not used: it carries the entity
+        tags of GET responses, which identify a representation, not the
+        version of a record.
+        """
+        if 'version' in payload:
+            return payload.pop('version')
+        header = (request.httprequest.headers.get(self.VERSION_HEADER) or '').strip()
+        if not header:
+            return None
+        try:
+            return int(header)
+        except ValueError:
+            raise ValueError(f'{self.VERSION_HEADER} must be an integer')
+
+    def _version_failure_response(self, label, current_version):
+        """404 for a missing or archived record, 409 for a version mismatch"""
+        if current_version is None:
+            return self._json_response({
+                'success': False,
+                'message': f'{label} not found'
+            }, status=404)
+        return self._json_response({
+            'success': False,
+            'message': f'{label} was modified by another request, reload it and retry',
+            'version': current_version,
+        }, status=409)
+
+    # ==================== PAGINATION HELPERS ====================
+
+    def _parse_page_params(self, kw, allowed_fields):
+        """Parse limit/after/fields query parameters, raise ValueError on bad input"""
+        fields_param = kw.get('fields')
+        if fields_param:
+            requested = {f.strip() for f in fields_param.split(',') if f.strip()}
+            unknown = requested - set(allowed_fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            # 'id' is always returned so records can be referenced
+            requested.add('id')
+            fields_list = [f for f in allowed_fields if f in requested]
+        else:
+            fields_list = list(allowed_fields)
+        
+        limit = self._parse_limit(kw.get('limit'))
+        after = kw.get('after')
+        after = self._decode_cursor(after) if after else None
+        return fields_list, limit, after
+
+    def _parse_limit(self, limit):
+        """Parse the limit query parameter, raise ValueError on bad input"""
+        if limit in (None, ''):
+            return self.DEFAULT_PAGE_SIZE
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValueError('limit must be an integer')
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        return min(limit, self.MAX_PAGE_SIZE)
+
+    def _encode_cursor(self, name, record_id):
+        """Encode the (name, id) keyset position as an opaque cursor"""
+        raw = json.dumps([name, record_id], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def _decode_cursor(self, cursor):
+        """Decode a cursor produced by _encode_cursor, raise ValueError if invalid"""
+        try:
+            name, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception:
+            raise ValueError('Invalid cursor')
+        if not isinstance(name, str) or not isinstance(record_id, int):
+            raise ValueError('Invalid cursor')
+        return name, record_id
+
+    def _read_page(self, model_name, domain, fields_list, limit, after):
+        """Read one page ordered by (name, id) with a single search_read
+
+        Returns the rows and the cursor of the next page (None on the last page).
+        One extra row is fetched to know whether another page exists.
+        """
+        Model = request.env[model_name].sudo()
+        if after:
+            name, last_id = after
+            domain = domain + ['|', ('name', '>', name), '&', ('name', '=', name), ('id', '>', last_id)]
+        
+        read_fields = self._stored_fields(model_name, fields_list)
+        if 'name' not in read_fields:
+            read_fields.append('name')
+        
+        rows = Model.search_read(domain, read_fields, order='name, id', limit=limit + 1, load=None)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1]['name'], rows[-1]['id'])
+        return rows, next_cursor
+
+    # ==================== BULK HELPERS ====================
+
+    def _is_async(self, kw):
+        return kw.get('async') in ('1', 'true', 'True')
+
+    def _parse_bulk_items(self, operations, schema, kw):
+        """Validate the shape and values of bulk operations
+
+        Returns the operations that passed validation as items
+        ({'index', 'op', 'id', 'values'}) and the results list, where failed
+        operations are already filled in. Raises ValueError when there are
+        more operations than allowed.
+        """
+        limit = self.MAX_ASYNC_BULK_OPERATIONS
+        if len(operations) > limit:
+            raise ValueError(f'At most {limit} operations are allowed per request')
+        
+        Bulk = request.env['kiosk.api.bulk']
+        results = [None] * len(operations)
+        items = []
+        for index, operation in enumerate(operations):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            item = {'index': index, 'op': op, 'id': None, 'values': {}}
+            if op not in ('create', 'update', 'archive'):
+                Bulk._fail(results, item, 'op must be one of create, update, archive')
+                continue
+            if op != 'archive':
+                try:
+                    item['values'] = validate(schema, operation.get('values') or {}, partial=(op == 'update'))
+                except ValueError as e:
+                    Bulk._fail(results, item, str(e))
+                    continue
+            if op != 'create':
+                try:
+                    item['id'] = int(operation.get('id'))
+                except (TypeError, ValueError):
+                    Bulk._fail(results, item, 'id is required')
+                    continue
+            items.append(item)
+        return items, results
+
+    def _bulk_response(self, model_name, items, results, kw):
+        """Apply bulk items now, or queue them for async=1 and oversized requests"""
+        if self._is_async(kw) or len(results) > self.MAX_BULK_OPERATIONS:
+            job = request.env['kiosk.api.job'].sudo()._enqueue_bulk(model_name, items, results)
+            return self._json_response({
+                'success': True,
+                'message': 'Bulk operations queued',
+                'job': self._job_to_dict(job),
+            }, status=202)
+        
+        request.env['kiosk.api.bulk'].sudo()._apply(model_name, items, results)
+        return self._json_response({
+            'success': all(result['success'] for result in results),
+            'results': results,
+        })
+
+    def _job_to_dict(self, job, with_results=False):
+        """Convert a kiosk.api.job record to dictionary"""
+        data = {
+            'id': job.id,
+            'kind': job.kind,
+            'state': job.state,
+            'done': job.done,
+            'total': job.total,
+            'progress': round(job.done / job.total, 4) if job.total else (1.0 if job.state == 'done' else 0.0),
+            'error': job.error or None,
+            'status_url': f'/api/jobs/{job.id}',
+        }
+        if with_results and job.kind == 'bulk' and job.state == 'done':
+            data['results'] = job._bulk_results()
+        return data
+
+    # ==================== CONDITIONAL GET HELPERS ====================
+
+    def _cache_validators(self):
+        """Return (etag, last_modified) for the current request, or None
+
+        The validator is the generation of the response cache (see
+        kiosk.api.cache), which changes after every committed write to
+        either table: machine payloads embed section data and section
+        payloads embed machine counts, so any change invalidates every GET
+        response. Record timestamps cannot be used, since a transaction can
+        commit rows stamped before changes that are already visible.
+        Last-Modified is the time of the last bump. None is returned while
+        that time falls in the current second, since Last-Modified has a one
+        second resolution and a second write within that second would
+        otherwise go unnoticed by clients holding the validator.
+        """
+        generation, last_modified, now = request.env['kiosk.api.cache'].sudo()._get_last_change()
+        if last_modified and last_modified >= now:
+            return None
+        
+        # Each representation (media type, coding) has its own entity tag
+        media_type, coding = self._negotiate()
+        state = f'{request.httprequest.full_path}|{media_type}|{coding}|{generation}'
+        etag = hashlib.sha1(state.encode('utf-8')).hexdigest()
+        return etag, last_modified
+
+    def _validator_headers(self, validators):
+        """ETag/Last-Modified headers for a response built under the given validators"""
+        if not validators:
+            return {'Cache-Control': 'no-cache'}
+        etag, last_modified = validators
+        headers = {
+            'Cache-Control': 'no-cache',
+            'ETag': f'"{etag}"',
+        }
+        if last_modified:
+            headers['Last-Modified'] = http_date(last_modified.replace(tzinfo=timezone.utc))
+        return headers
+
+    def _not_modified_response(self, validators):
+        """Return a 304 response when the client already holds the current data"""
+        if not validators:
+            return None
+        etag, last_modified = validators
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+            not_modified = httprequest.if_none_match.contains(etag)
+        elif httprequest.if_modified_since and last_modified:
+            not_modified = last_modified.replace(tzinfo=timezone.utc) <= httprequest.if_modified_since
+        else:
+            not_modified = False
+        if not not_modified:
+            return None
+        return Response(status=304, headers=dict(self._cors_headers(), Vary=self.VARY,
+                                                 **self._validator_headers(validators)))
+
+    # ==================== RESPONSE CACHE HELPERS ====================
+
+    def _response_cache_lookup(self):
+        """Return (cache token, cached response or None) for the current GET request
+
+        The token must be passed to _response_cache_store: it holds the
+        generation read before any data, so a response built from data older
+        than a concurrent write is never cached under the newer generation.
+        """
+        generation = request.env['kiosk.api.cache'].sudo()._get_generation()
+        # Workers may serve several databases, each with its own generations
+        token = ((request.db, request.httprequest.full_path) + self._negotiate(), generation)
+        entry = response_cache.get(*token)
+        if entry is None:
+            return token, None
+        
+        body, headers, validators = entry
+        not_modified = self._not_modified_response(validators)
+        if not_modified:
+            return token, not_modified
+        return token, Response(body, status=200, headers=headers)
+
+    def _response_cache_store(self, token, validators, response):
+        """Cache a successful response under token and return it unchanged"""
+        if response.status_code == 200:
+            body = response.get_data()
+            response_cache.set(*token, (body, dict(response.headers), validators), size=len(body))
+        return response
+
+    # ==================== SYNC HELPERS ====================
+
+    def _encode_sync_token(self, state):
+        """Encode {'sections': [write_xid, id], 'machines': [write_xid, id]} as a token
+
+        Tokens started from a timestamp also carry it as changed_since.
+        """
+        raw = json.dumps(state).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def _decode_sync_token(self, since):
+        """Decode a sync token or a plain timestamp, raise ValueError if invalid"""
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(since.encode('ascii')))
+            state = {key: [int(raw[key][0]), int(raw[key][1])] for key in ('sections', 'machines')}
+            if raw.get('changed_since'):
+                state['changed_since'] = fields.Datetime.to_string(fields.Datetime.to_datetime(raw['changed_since']))
+            return state
+        except Exception:
+            pass
+        
+        try:
+            timestamp = datetime.fromisoformat(since)
+        except ValueError:
+            raise ValueError('since must be a sync token or a timestamp')
+        if timestamp.tzinfo:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        # Every transaction, restricted to records changed since the timestamp
         return {
-            'id': machine.id,
-            'name': machine.name,
-            'section_id': machine.section_id.id if machine.section_id else None,
-            'section_name': machine.section_id.name if machine.section_id else None,
-            'section_location': machine.section_id.location if machine.section_id else None,
-            'created_at': machine.created_at.isoformat() if machine.created_at else None,
-            'updated_at': machine.updated_at.isoformat() if machine.updated_at else None,
+            'sections': [0, 0],
+            'machines': [0, 0],
+            'changed_since': fields.Datetime.to_string(timestamp.replace(microsecond=0)),
         }
 
+    def _sync_horizon(self):
+        """Return the transaction id below which every change is visible to this request
+
+        Each row holds the id of the transaction that last wrote it
+        (write_xid, see kiosk.api.versioned). Transactions commit in any
+        order, so changes are sent in write_xid order only up to the xmin of
+        the request's own snapshot: every transaction below it has ended,
+        and its rows are visible or rolled back. Rows of transactions still
+        running wait for a later sync. Only transactions that wrote hold
+        the horizon back, and since the snapshot is the one the rows are
+        read with, this also holds on a read replica.
+        """
+        cr = request.env.cr
+        cr.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return cr.fetchone()[0]
+
+    def _read_changes(self, model_name, fields_list, position, horizon, limit, changed_since=None):
+        """Read one page of records changed after position, archived ones included
+
+        Rows are ordered by (write_xid, id) and position is the last
+        [write_xid, id] pair already sent; only rows below horizon are read.
+        Without a position only active records are read. Returns the rows,
+        the new position and whether more rows remain.
+        """
+        Model = request.env[model_name].sudo().with_context(active_test=False)
+        last_xid, last_id = position or (0, 0)
+        conditions = ['write_xid < %(horizon)s', '(write_xid, id) > (%(xid)s, %(id)s)']
+        if not position:
+            conditions.append('active')
+        if changed_since:
+            conditions.append('updated_at >= %(changed_since)s')
+        cr = request.env.cr
+        cr.execute(f"""
+            SELECT id, write_xid FROM {Model._table}
+             WHERE {' AND '.join(conditions)}
+          ORDER BY write_xid, id
+             LIMIT %(limit)s
+        """, {'horizon': horizon, 'xid': last_xid, 'id': last_id, 'changed_since': changed_since,
+              'limit': limit + 1})
+        keys = cr.fetchall()
+        has_more = len(keys) > limit
+        keys = keys[:limit]
+        
+        read_fields = self._stored_fields(model_name, fields_list) + ['active']
+        rows = Model.browse([record_id for record_id, _xid in keys]).read(read_fields, load=None)
+        if keys:
+            position = [keys[-1][1], keys[-1][0]]
+        elif not position:
+            # Nothing to send yet: later syncs start from the horizon
+            position = [horizon, 0]
+        return rows, position, has_more
+
+    # ==================== EXPORT HELPERS ====================
+
+    def _export_lines(self, registry, readonly=False):
+        """Yield the /api/export body in encoded chunks
+
+        The generator runs after the request transaction is closed, so it
+        works on its own cursor, read-only (on the replica, if any) when
+        readonly is set. Sections and their machines come from one ordered
+        join read through a DECLAREd cursor.
+        """
+        with registry.cursor(readonly=readonly) as cr:
+            cr.execute("""
+                DECLARE kiosk_export NO SCROLL CURSOR FOR
+                SELECT s.id, s.name, s.section_id, s.location, s.created_at, s.updated_at, s.version,
+                       COALESCE(c.machine_count, 0),
+                       m.id, m.name, m.created_at, m.updated_at, m.version
+                  FROM kiosk_section s
+             LEFT JOIN (SELECT section_id, count(*) AS machine_count
+                          FROM section_machine
+                         WHERE active
+                      GROUP BY section_id) c ON c.section_id = s.id
+             LEFT JOIN section_machine m ON m.section_id = s.id AND m.active
+                 WHERE s.active
+              ORDER BY s.name, s.id, m.name, m.id
+            """)
+            current_section = None
+            while True:
+                cr.execute("FETCH FORWARD %s FROM kiosk_export", [self.EXPORT_BATCH_SIZE])
+                rows = cr.fetchall()
+                if not rows:
+                    break
+                
+                lines = []
+                for (section_id, section_name, section_code, location, section_created, section_updated,
+                        section_version, machine_count, machine_id, machine_name, machine_created,
+                        machine_updated, machine_version) in rows:
+                    if section_id != current_section:
+                        current_section = section_id
+                        section = self.SECTION_ENCODER.encode_one({
+                            'id': section_id,
+                            'name': section_name,
+                            'section_id': section_code,
+                            'location': location,
+                            'created_at': section_created,
+                            'updated_at': section_updated,
+                            'version': section_version,
+                            'machine_count': machine_count,
+                        })
+                        lines.append(dumps(dict(type='section', **section)))
+                    if machine_id:
+                        machine = self.MACHINE_ENCODER.encode_one({
+                            'id': machine_id,
+                            'name': machine_name,
+                            'section_id': section_id,
+                            'section_name': section_name,
+                            'section_location': location,
+                            'created_at': machine_created,
+                            'updated_at': machine_updated,
+                            'version': machine_version,
+                        })
+                        lines.append(dumps(dict(type='machine', **machine)))
+                lines.append(b'')
+                yield b'\n'.join(lines)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+from datetime import date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compression settings favouring speed: responses are compressed per request
+# (or once per cache generation when they are cached)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _default(value):
+    """json.dumps fallback for values stdlib json cannot encode"""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """Serialize data to UTF-8 encoded JSON bytes
+
+    orjson is used when it is installed; it encodes datetimes natively in the
+    same ISO 8601 format as datetime.isoformat().
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def packb(data):
+    """Serialize data to MessagePack bytes; requires msgpack
+
+    Datetimes are sent as ISO 8601 strings, as in JSON responses.
+    """
+    return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+def content_codings():
+    """Content codings responses can be compressed with, in order of preference"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, coding):
+    """Compress body with a coding returned by content_codings()"""
+    if coding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def loads(data):
+    """Parse JSON from bytes (or str), with orjson when it is installed
+
+    Raises ValueError on malformed input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class RecordEncoder:
+    """Build API dictionaries straight from search_read rows
+
+    fields is the ordered list of exposed fields and datetime_fields the ones
+    holding datetimes. Datetimes are left to orjson when it is available,
+    otherwise each distinct value is formatted once per call: records written
+    together share their timestamps.
+    """
+
+    def __init__(self, fields, datetime_fields=()):
+        self.fields = tuple(fields)
+        self.datetime_fields = frozenset(datetime_fields)
+
+    def encode(self, rows, fields=None):
+        """Return one dictionary per row, restricted to fields when given"""
+        fields = tuple(fields or self.fields)
+        datetime_fields = self.datetime_fields if orjson is None else frozenset()
+        formatted = {}
+        records = []
+        for row in rows:
+            record = {}
+            for name in fields:
+                value = row.get(name)
+                if value is False:
+                    value = None
+                elif value is not None and name in datetime_fields:
+                    text = formatted.get(value)
+                    if text is None:
+                        text = formatted[value] = value.isoformat()
+                    value = text
+                record[name] = value
+            records.append(record)
+        return records
+
+    def encode_columns(self, rows, fields=None):
+        """Return {field: [values]}, the columnar form of encode()
+
+        Keys are written once instead of once per row, which makes large
+        listings smaller and faster to encode.
+        """
+        fields = tuple(fields or self.fields)
+        datetime_fields = self.datetime_fields if orjson is None else frozenset()
+        formatted = {}
+        columns = {}
+        for name in fields:
+            values = [row.get(name) for row in rows]
+            if name in datetime_fields:
+                for index, value in enumerate(values):
+                    if value:
+                        text = formatted.get(value)
+                        if text is None:
+                            text = formatted[value] = value.isoformat()
+                        values[index] = text
+            columns[name] = [None if value is False else value for value in values]
+        return columns
+
+    def encode_joined_columns(self, rows, key, joined, fields=None):
+        """Return (columns, joined columns or None): encode_columns() with copied fields split out
+
+        joined maps the row fields copied from the record referenced by key
+        (e.g. section_name) to their name in the joined table, which holds
+        them once per distinct key, in order of first appearance, under an
+        'id' column matching key. Without key or any joined field among
+        fields, the joined table is None.
+        """
+        fields = tuple(fields or self.fields)
+        copied = [name for name in joined if name in fields]
+        if not copied or key not in fields:
+            return self.encode_columns(rows, fields), None
+
+        first_rows = {}
+        for row in rows:
+            first_rows.setdefault(row[key], row)
+        table = {'id': list(first_rows)}
+        for name in copied:
+            table[joined[name]] = [row[name] or None for row in first_rows.values()]
+        return self.encode_columns(rows, [name for name in fields if name not in copied]), table
+
+    def encode_one(self, row, fields=None):
+        """Return the dictionary of a single row"""
+        return self.encode([row], fields)[0]
+
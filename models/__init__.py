@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from . import api_bulk
+from . import api_bus
+from . import api_cache
+from . import api_job
+from . import api_job_batch
+from . import api_versioned
 from . import section
 from . import machine
-
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+
+class ApiBulk(models.AbstractModel):
+    _name = 'kiosk.api.bulk'
+    _description = 'API Bulk Operations'
+
+    @api.model
+    def _fail(self, results, item, message):
+        """Record a failed bulk operation"""
+        results[item['index']] = {
+            'index': item['index'],
+            'op': item['op'],
+            'success': False,
+            'message': message,
+        }
+
+    @api.model
+    def _apply(self, model_name, items, results):
+        """Check and apply bulk items of kiosk.section or section.machine
+
+        items are operations whose shape and values were already validated
+        ({'index', 'op', 'id', 'values'}); results is the per-operation
+        result list (or a dict keyed by operation index), filled in for
+        every item. Targets, section codes and referenced sections are each
+        checked with one query. Returns results.
+        """
+        items = self._check_targets(model_name, items, results)
+        if model_name == 'kiosk.section':
+            items = self._check_section_codes(items, results)
+        else:
+            items = self._check_machine_sections(items, results)
+        self._write(model_name, items, results)
+        return results
+
+    @api.model
+    def _check_targets(self, model_name, items, results):
+        """Drop items whose update/archive target does not exist (or is archived, for updates)"""
+        target_ids = [item['id'] for item in items if item['id']]
+        active_by_id = {}
+        if target_ids:
+            rows = self.env[model_name].sudo().with_context(active_test=False).search_read(
+                [('id', 'in', target_ids)], ['active'],
+            )
+            active_by_id = {row['id']: row['active'] for row in rows}
+
+        valid_items = []
+        for item in items:
+            if item['op'] != 'create':
+                if item['id'] not in active_by_id or (item['op'] == 'update' and not active_by_id[item['id']]):
+                    self._fail(results, item, 'Record not found')
+                    continue
+            valid_items.append(item)
+        return valid_items
+
+    @api.model
+    def _check_section_codes(self, items, results):
+        """Drop section items that would duplicate a section_id code, in the batch or the table"""
+        codes = [item['values']['section_id'] for item in items if item['values'].get('section_id')]
+        existing = self.env['kiosk.section'].sudo().with_context(active_test=False).search_read(
+            [('section_id', 'in', codes)], ['section_id'],
+        ) if codes else []
+        owners = {row['section_id']: row['id'] for row in existing}
+        valid_items = []
+        for item in items:
+            code = item['values'].get('section_id')
+            if code and owners.get(code, item.get('id')) != item.get('id'):
+                self._fail(results, item, f'Section ID {code} already exists')
+                continue
+            if code:
+                owners[code] = item.get('id') or ('new', item['index'])
+            valid_items.append(item)
+        return valid_items
+
+    @api.model
+    def _check_machine_sections(self, items, results):
+        """Drop machine items referencing a missing or archived section"""
+        section_ids = {item['values']['section_id'] for item in items if 'section_id' in item['values']}
+        active_sections = set(self.env['kiosk.section'].sudo().search([
+            ('id', 'in', list(section_ids)),
+            ('active', '=', True),
+        ]).ids) if section_ids else set()
+
+        valid_items = []
+        for item in items:
+            if 'section_id' in item['values'] and item['values']['section_id'] not in active_sections:
+                self._fail(results, item, 'Section not found')
+                continue
+            valid_items.append(item)
+        return valid_items
+
+    @api.model
+    def _write(self, model_name, items, results):
+        """Apply checked items and fill in their results
+
+        All creates go through a single create(vals_list) call and all archives
+        through a single write; updates are written one by one. Everything runs
+        in one savepoint so a database error leaves no partial batch behind.
+        """
+        Model = self.env[model_name].sudo()
+        creates = [item for item in items if item['op'] == 'create']
+        archive_ids = [item['id'] for item in items if item['op'] == 'archive']
+        with self.env.cr.savepoint():
+            if creates:
+                records = Model.create([item['values'] for item in creates])
+                for item, record in zip(creates, records):
+                    item['id'] = record.id
+            for item in items:
+                if item['op'] == 'update' and item['values']:
+                    Model.browse(item['id']).write(item['values'])
+            if archive_ids:
+                Model.browse(archive_ids).write({'active': False})  # Soft delete
+
+        for item in items:
+            results[item['index']] = {
+                'index': item['index'],
+                'op': item['op'],
+                'success': True,
+                'id': item['id'],
+            }
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+from odoo import models, api
+
+
+class ApiBus(models.AbstractModel):
+    _name = 'kiosk.api.bus'
+    _description = 'API Change Notifications'
+
+    # Every change is announced on the global channel and on the channel of
+    # each section it touches; kiosks subscribe to the ones they display.
+    _channel = 'kiosk_api'
+    _notification_type = 'kiosk_api/changed'
+    # Events listing more ids than this only ask clients to resync
+    _max_ids = 500
+
+    @api.model
+    def _section_channel(self, section_id):
+        return f'{self._channel}_section_{section_id}'
+
+    @api.model
+    def _notify_changes(self, section_ids=(), machines_by_section=None):
+        """Queue change notifications for the current transaction
+
+        Changes are accumulated until the transaction is about to commit and
+        then sent as one bus notification per channel, so a bulk write
+        produces a single event per section instead of one per record.
+        machines_by_section maps section ids to the changed machine ids.
+        """
+        precommit = self.env.cr.precommit
+        changes = precommit.data.get('kiosk_api_bus_changes')
+        if changes is None:
+            changes = precommit.data['kiosk_api_bus_changes'] = {
+                'sections': set(),
+                'machines': defaultdict(set),
+            }
+            env = self.env
+
+            @precommit.add
+            def send_changes():
+                env['kiosk.api.bus'].sudo()._send_changes(changes)
+
+        changes['sections'].update(section_ids)
+        for section_id, machine_ids in (machines_by_section or {}).items():
+            changes['machines'][section_id].update(machine_ids)
+
+    @api.model
+    def _event(self, section_ids, machine_ids):
+        if len(section_ids) + len(machine_ids) > self._max_ids:
+            return {'resync': True}
+        return {'sections': sorted(section_ids), 'machines': sorted(machine_ids)}
+
+    @api.model
+    def _send_changes(self, changes):
+        notifications = []
+        all_machine_ids = set()
+        for section_id in sorted(changes['sections'] | set(changes['machines'])):
+            machine_ids = changes['machines'].get(section_id, set())
+            all_machine_ids |= machine_ids
+            section_ids = {section_id} if section_id in changes['sections'] else set()
+            notifications.append((
+                self._section_channel(section_id),
+                self._notification_type,
+                self._event(section_ids, machine_ids),
+            ))
+        notifications.append((
+            self._channel,
+            self._notification_type,
+            self._event(changes['sections'], all_machine_ids),
+        ))
+        self.env['bus.bus'].sudo()._sendmany(notifications)
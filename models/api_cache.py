@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+# One row per cache scope: 'all' changes on every write, 'sections' on
+# section writes only
+GENERATION_TABLE = 'kiosk_api_cache_generations'
+
+
+class ApiCache(models.AbstractModel):
+    _name = 'kiosk.api.cache'
+    _description = 'API Response Cache Generation'
+
+    # Generations are rows of GENERATION_TABLE so that every worker process
+    # sees the same value. They are not sequences: a standby only sees a
+    # sequence move every 32 nextval calls (or after a checkpoint), while a
+    # row update replicates with the transaction that made it, so routes
+    # served from a read replica follow the generation exactly.
+    _scopes = ('all', 'sections')
+
+    def init(self):
+        cr = self.env.cr
+        # Generations used to be kept in sequences
+        cr.execute("DROP SEQUENCE IF EXISTS kiosk_api_cache_generation, kiosk_api_section_generation")
+        cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {GENERATION_TABLE} (
+                scope varchar PRIMARY KEY,
+                generation bigint NOT NULL DEFAULT 0,
+                changed_at timestamp
+            )
+        """)
+        cr.execute(f"INSERT INTO {GENERATION_TABLE} (scope) SELECT unnest(%s::varchar[]) ON CONFLICT DO NOTHING",
+                   [list(self._scopes)])
+
+    @api.model
+    def _get_generation(self, scope='all'):
+        """Return the current generation of a cache scope"""
+        self.env.cr.execute(f"SELECT generation FROM {GENERATION_TABLE} WHERE scope = %s", [scope])
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _get_last_change(self, scope='all'):
+        """Return (generation, time of its last bump or None, current time) of a cache scope
+
+        Times are UTC, truncated to the second, from the database clock.
+        Since generations are bumped after the commit, changed_at follows
+        commit order, unlike the updated_at of the records.
+        """
+        self.env.cr.execute(f"""
+            SELECT generation, changed_at, date_trunc('second', clock_timestamp() AT TIME ZONE 'UTC')
+              FROM {GENERATION_TABLE}
+             WHERE scope = %s
+        """, [scope])
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _invalidate(self, scopes=('all',)):
+        """Bump the generation of the given scopes once the current transaction commits
+
+        Bumping after the commit guarantees that a worker seeing the new
+        generation also sees the committed data. Each scope is bumped once
+        per transaction however many records are written.
+        """
+        postcommit = self.env.cr.postcommit
+        pending = postcommit.data.setdefault('kiosk_api_cache_invalidate', set())
+        if not pending:
+            registry = self.env.registry
+
+            @postcommit.add
+            def bump_generations():
+                with registry.cursor() as cr:
+                    # One statement per scope, always in the same order, so
+                    # concurrent bumps lock the rows in the same order
+                    for scope in sorted(pending):
+                        cr.execute(f"""
+                            UPDATE {GENERATION_TABLE}
+                               SET generation = generation + 1,
+                                   changed_at = date_trunc('second', now() AT TIME ZONE 'UTC')
+                             WHERE scope = %s
+                        """, [scope])
+        pending.update(scopes)
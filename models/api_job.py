@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class ApiJob(models.Model):
+    _name = 'kiosk.api.job'
+    _description = 'API Background Job'
+    _order = 'id'
+
+    kind = fields.Selection([
+        ('bulk', 'Bulk Operations'),
+        ('section_propagation', 'Section Propagation'),
+    ], string='Kind', required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', required=True, default='pending', index=True)
+    model_name = fields.Char(string='Model')
+    section_id = fields.Many2one('kiosk.section', string='Section', ondelete='cascade')
+    payload = fields.Json(string='Payload')
+    # Bulk jobs: results of the operations rejected before queuing; the
+    # items to apply and their results are kept per batch
+    results = fields.Json(string='Results')
+    batch_ids = fields.One2many('kiosk.api.job.batch', 'job_id', string='Batches')
+    done = fields.Integer(string='Done', default=0)
+    total = fields.Integer(string='Total', default=0)
+    error = fields.Text(string='Error')
+    created_at = fields.Datetime(string='Created At', default=fields.Datetime.now, readonly=True)
+    updated_at = fields.Datetime(string='Updated At', default=fields.Datetime.now, readonly=True)
+
+    # Items (bulk operations or machines) handled per transaction
+    _batch_size = 500
+    # Seconds a cron run may spend before handing over to a new run
+    _time_budget = 60
+
+    def write(self, vals):
+        vals['updated_at'] = fields.Datetime.now()
+        return super(ApiJob, self).write(vals)
+
+    # ==================== ENQUEUING ====================
+
+    @api.model
+    def _trigger_processing(self):
+        self.env.ref(f'{self._module}.ir_cron_kiosk_api_jobs').sudo()._trigger()
+
+    @api.model
+    def _enqueue_bulk(self, model_name, items, results):
+        """Queue validated bulk items (see kiosk.api.bulk) and return the job
+
+        The items are split into batches of _batch_size, each stored in its
+        own kiosk.api.job.batch row.
+        """
+        job = self.sudo().create({
+            'kind': 'bulk',
+            'model_name': model_name,
+            'results': [result for result in results if result],
+            'total': len(items),
+        })
+        self.env['kiosk.api.job.batch'].sudo().create([{
+            'job_id': job.id,
+            'sequence': sequence,
+            'items': items[start:start + self._batch_size],
+        } for sequence, start in enumerate(range(0, len(items), self._batch_size))])
+        self._trigger_processing()
+        return job
+
+    @api.model
+    def _enqueue_section_propagation(self, section, machine_count):
+        """Queue copying the name and location of section to its machines
+
+        A job already waiting for the same section is restarted instead of
+        queuing a second one, since it copies the values current when it runs.
+        """
+        vals = {
+            'state': 'pending',
+            'payload': {'last_id': 0},
+            'done': 0,
+            'total': machine_count,
+            'error': False,
+        }
+        job = self.sudo().search([
+            ('kind', '=', 'section_propagation'),
+            ('section_id', '=', section.id),
+            ('state', 'in', ('pending', 'running')),
+        ], limit=1)
+        if job:
+            job.write(vals)
+        else:
+            job = self.sudo().create(dict(vals, kind='section_propagation', section_id=section.id))
+        self._trigger_processing()
+        return job
+
+    # ==================== PROCESSING ====================
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Process queued jobs batch by batch, committing after each batch"""
+        deadline = time.monotonic() + self._time_budget
+        while time.monotonic() < deadline:
+            job = self.search([('state', 'in', ('pending', 'running'))], limit=1)
+            if not job:
+                return
+            job._process_batch()
+            self.env.cr.commit()
+        # Out of time with jobs left: let a fresh cron run continue
+        self._trigger_processing()
+
+    def _process_batch(self):
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                if self.kind == 'bulk':
+                    self._process_bulk_batch()
+                else:
+                    self._process_propagation_batch()
+        except Exception as e:
+            _logger.error("Kiosk API job %s failed: %s", self.id, e, exc_info=True)
+            self.write({'state': 'failed', 'error': str(e)})
+
+    def _process_bulk_batch(self):
+        # The second row, if any, only tells whether batches remain after this one
+        batches = self.env['kiosk.api.job.batch'].sudo().search([
+            ('job_id', '=', self.id),
+            ('done', '=', False),
+        ], limit=2)
+        items = batches[:1].items or []
+        if items:
+            # Results keyed by operation index, as in the results list of a request
+            results = self.env['kiosk.api.bulk']._apply(self.model_name, items, {})
+            batches[:1].write({
+                'results': [results[item['index']] for item in items],
+                'done': True,
+            })
+        self.write({
+            'done': self.done + len(items),
+            'state': 'running' if len(batches) > 1 else 'done',
+        })
+
+    def _bulk_results(self):
+        """Return the results of every operation of a bulk job, in request order"""
+        self.ensure_one()
+        results = list(self.results or [])
+        for batch in self.batch_ids:
+            results.extend(batch.results or [])
+        return sorted(results, key=lambda result: result['index'])
+
+    def _process_propagation_batch(self):
+        section = self.section_id
+        machines = self.env['section.machine'].sudo().with_context(active_test=False).search([
+            ('section_id', '=', section.id),
+            ('id', '>', self.payload['last_id']),
+        ], order='id', limit=self._batch_size)
+        if machines:
+            machines.write({
+                'section_name': section.name,
+                'section_location': section.location,
+            })
+        self.write({
+            'payload': {'last_id': machines[-1].id if machines else self.payload['last_id']},
+            'done': self.done + len(machines),
+            'state': 'running' if len(machines) == self._batch_size else 'done',
+        })
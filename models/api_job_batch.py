@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class ApiJobBatch(models.Model):
+    _name = 'kiosk.api.job.batch'
+    _description = 'API Background Job Batch'
+    _order = 'job_id, sequence'
+
+    # One row per transaction of a bulk job, so a batch only reads its own
+    # items and writes its own results instead of the whole request
+    job_id = fields.Many2one('kiosk.api.job', string='Job', required=True, index=True, ondelete='cascade')
+    sequence = fields.Integer(string='Sequence', required=True)
+    items = fields.Json(string='Items')
+    results = fields.Json(string='Results')
+    done = fields.Boolean(string='Done', default=False)
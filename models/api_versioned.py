@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from psycopg2 import errors
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+
+class ApiVersioned(models.AbstractModel):
+    _name = 'kiosk.api.versioned'
+    _description = 'API Record Version'
+
+    # Bumped by every write; clients send it back with an update to apply
+    # it only to the version they have seen
+    version = fields.Integer(string='Version', default=1, readonly=True, copy=False)
+
+    def init(self):
+        super(ApiVersioned, self).init()
+        # write_xid is the id of the transaction that last created or wrote
+        # the row (txid_current(), epoch extended, so it never wraps). It is
+        # not an ORM field: the column default and the version bumps below
+        # maintain it, and /api/sync pages on (write_xid, id).
+        self.env.cr.execute(f"""
+            ALTER TABLE {self._table}
+            ADD COLUMN IF NOT EXISTS write_xid bigint NOT NULL DEFAULT txid_current()
+        """)
+        create_index(self.env.cr, f'{self._table}_write_xid_id_idx', self._table, ['write_xid', 'id'])
+
+    def write(self, vals):
+        result = super(ApiVersioned, self).write(vals)
+        # _write_if_version already bumped the record it claimed
+        if self.ids and self.env.context.get('kiosk_api_version_claimed') != (self._name, tuple(self.ids)):
+            self.env.cr.execute(
+                f"UPDATE {self._table} SET version = version + 1, write_xid = txid_current() WHERE id = ANY(%s)",
+                [self.ids])
+            self.invalidate_recordset(['version'])
+        return result
+
+    @api.model
+    def _write_if_version(self, record_id, version, vals):
+        """Write vals on an active record only if it is still at version
+
+        The version check, row lock and bump are one statement that does not
+        wait for a row locked by another transaction: a concurrent edit is
+        reported at once instead of blocking, or raising a serialization
+        failure that would make Odoo retry the whole request. Returns
+        (record, current_version): the written record, or an empty recordset
+        and the version found (None when the record is missing or archived).
+        """
+        cr = self.env.cr
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute(f"""
+                    UPDATE {self._table} SET version = version + 1, write_xid = txid_current()
+                     WHERE id = (SELECT id FROM {self._table}
+                                  WHERE id = %s AND version = %s AND active
+                                    FOR UPDATE NOWAIT)
+                 RETURNING id
+                """, [record_id, version])
+                claimed = cr.fetchone()
+        except errors.LockNotAvailable:
+            claimed = None
+        except errors.SerializationFailure:
+            # The row changed after this transaction's snapshot was taken,
+            # which still shows the old version: read it on a new cursor
+            with self.env.registry.cursor() as fresh_cr:
+                return self.browse(), self._current_version(fresh_cr, record_id)
+
+        if not claimed:
+            return self.browse(), self._current_version(cr, record_id)
+
+        record = self.browse(record_id)
+        record.invalidate_recordset(['version'])
+        record.with_context(kiosk_api_version_claimed=(self._name, (record_id,))).write(vals)
+        return record, None
+
+    @api.model
+    def _current_version(self, cr, record_id):
+        """Return the version of an active record as seen by cr, None if missing or archived"""
+        cr.execute(f"SELECT version, active FROM {self._table} WHERE id = %s", [record_id])
+        row = cr.fetchone()
+        return row[0] if row and row[1] else None
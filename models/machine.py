@@ -1,27 +1,86 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api
+from odoo.tools.sql import create_index
 
 class Machine(models.Model):
     _name = 'section.machine'
+    _inherit = ['kiosk.api.versioned']
     _description = 'Machine'
     _order = 'name'
 
     name = fields.Char(string='Machine Name', required=True)
     section_id = fields.Many2one('kiosk.section', string='Section', required=True, ondelete='cascade')
-    section_name = fields.Char(related='section_id.name', string='Section Name', readonly=True, store=True)
-    section_location = fields.Char(related='section_id.location', string='Section Location', readonly=True, store=True)
+    # Copies of the section name and location, kept up to date by
+    # kiosk.section.write (through a background job for large sections)
+    section_name = fields.Char(string='Section Name', readonly=True)
+    section_location = fields.Char(string='Section Location', readonly=True)
     active = fields.Boolean(string='Active', default=True)
     created_at = fields.Datetime(string='Created At', default=fields.Datetime.now, readonly=True)
-    updated_at = fields.Datetime(string='Updated At', default=fields.Datetime.now, readonly=True)
+    updated_at = fields.Datetime(string='Updated At', default=fields.Datetime.now, readonly=True, index=True)
 
-    @api.model
-    def create(self, vals):
-        vals['created_at'] = fields.Datetime.now()
-        vals['updated_at'] = fields.Datetime.now()
-        return super(Machine, self).create(vals)
+    def init(self):
+        super(Machine, self).init()
+        # Active machines listed in keyset order (name, id)
+        create_index(self.env.cr, 'section_machine_active_name_id_idx', self._table,
+                     ['name', 'id'], where='active')
+        # Active machines of one section, in the same order, and per-section counts
+        create_index(self.env.cr, 'section_machine_active_section_name_id_idx', self._table,
+                     ['section_id', 'name', 'id'], where='active')
+        # All machines of one section, archived ones included, in id order:
+        # propagation counts and job batches, ON DELETE CASCADE
+        create_index(self.env.cr, 'section_machine_section_id_id_idx', self._table, ['section_id', 'id'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Stamped with the start of the transaction, on the database clock
+        now = self.env.cr.now().replace(microsecond=0)
+        for vals in vals_list:
+            vals['created_at'] = now
+            vals['updated_at'] = now
+        self._copy_section_values(vals_list)
+        self.env['kiosk.api.cache']._invalidate()
+        machines = super(Machine, self).create(vals_list)
+        machines._notify_changes()
+        return machines
 
     def write(self, vals):
-        vals['updated_at'] = fields.Datetime.now()
-        return super(Machine, self).write(vals)
+        vals['updated_at'] = self.env.cr.now().replace(microsecond=0)
+        if vals.get('section_id'):
+            self._copy_section_values([vals])
+        self.env['kiosk.api.cache']._invalidate()
+        if 'section_id' in vals:
+            # Also announce the change on the sections the machines leave
+            self._notify_changes()
+        result = super(Machine, self).write(vals)
+        self._notify_changes()
+        return result
+
+    def unlink(self):
+        self.env['kiosk.api.cache']._invalidate()
+        self._notify_changes()
+        return super(Machine, self).unlink()
+
+    @api.model
+    def _copy_section_values(self, vals_list):
+        """Fill section_name and section_location of vals with a section_id"""
+        section_ids = {vals['section_id'] for vals in vals_list if vals.get('section_id')}
+        if not section_ids:
+            return
+        sections = {
+            row['id']: row
+            for row in self.env['kiosk.section'].sudo().browse(list(section_ids)).read(['name', 'location'])
+        }
+        for vals in vals_list:
+            section = sections.get(vals.get('section_id'))
+            if section:
+                vals['section_name'] = section['name']
+                vals['section_location'] = section['location']
+
+    def _notify_changes(self):
+        """Queue a bus notification for these machines on their sections' channels"""
+        machines_by_section = {}
+        for row in self.sudo().read(['section_id'], load=None):
+            machines_by_section.setdefault(row['section_id'], []).append(row['id'])
+        self.env['kiosk.api.bus']._notify_changes(machines_by_section=machines_by_section)
 
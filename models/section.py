@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api
+from odoo.tools.sql import create_index
 
 class Section(models.Model):
     _name = 'kiosk.section'
+    _inherit = ['kiosk.api.versioned']
     _description = 'Section'
     _order = 'name'
 
@@ -12,22 +14,74 @@ class Section(models.Model):
     location = fields.Char(string='Location', required=True)
     active = fields.Boolean(string='Active', default=True)
     created_at = fields.Datetime(string='Created At', default=fields.Datetime.now, readonly=True)
-    updated_at = fields.Datetime(string='Updated At', default=fields.Datetime.now, readonly=True)
+    updated_at = fields.Datetime(string='Updated At', default=fields.Datetime.now, readonly=True, index=True)
     
     # One2many relation to machines
     machine_ids = fields.One2many('section.machine', 'section_id', string='Machines')
 
+    # Past this many machines, name/location changes reach them through a background job
+    _sync_propagation_limit = 1000
+
     _sql_constraints = [
         ('section_id_unique', 'unique(section_id)', 'Section ID must be unique!'),
     ]
 
-    @api.model
-    def create(self, vals):
-        vals['created_at'] = fields.Datetime.now()
-        vals['updated_at'] = fields.Datetime.now()
-        return super(Section, self).create(vals)
+    def init(self):
+        super(Section, self).init()
+        # Active sections listed in keyset order (name, id)
+        create_index(self.env.cr, 'kiosk_section_active_name_id_idx', self._table,
+                     ['name', 'id'], where='active')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Stamped with the start of the transaction, on the database clock
+        now = self.env.cr.now().replace(microsecond=0)
+        for vals in vals_list:
+            vals['created_at'] = now
+            vals['updated_at'] = now
+        self.env['kiosk.api.cache']._invalidate(('all', 'sections'))
+        sections = super(Section, self).create(vals_list)
+        self.env['kiosk.api.bus']._notify_changes(section_ids=sections.ids)
+        return sections
 
     def write(self, vals):
-        vals['updated_at'] = fields.Datetime.now()
-        return super(Section, self).write(vals)
+        vals['updated_at'] = self.env.cr.now().replace(microsecond=0)
+        self.env['kiosk.api.cache']._invalidate(('all', 'sections'))
+        self.env['kiosk.api.bus']._notify_changes(section_ids=self.ids)
+        copied = {}
+        if 'name' in vals or 'location' in vals:
+            copied = {section.id: (section.name, section.location) for section in self}
+        result = super(Section, self).write(vals)
+        # Only sections whose values really changed are copied to their
+        # machines: rewriting them would bump their updated_at and version
+        changed = self.filtered(lambda section: section.id in copied
+                                and copied[section.id] != (section.name, section.location))
+        if changed:
+            changed._propagate_to_machines()
+        return result
+
+    def unlink(self):
+        self.env['kiosk.api.cache']._invalidate(('all', 'sections'))
+        self.env['kiosk.api.bus']._notify_changes(section_ids=self.ids)
+        return super(Section, self).unlink()
+
+    def _propagate_to_machines(self):
+        """Copy name and location to the machines of these sections
 
+        Small sections are updated right away; larger ones are handed to a
+        kiosk.api.job so the request does not hold locks on every machine.
+        """
+        Machine = self.env['section.machine'].sudo().with_context(active_test=False)
+        counts = {
+            section.id: count
+            for section, count in Machine._read_group([('section_id', 'in', self.ids)], ['section_id'], ['__count'])
+        }
+        for section in self:
+            count = counts.get(section.id, 0)
+            if count > self._sync_propagation_limit:
+                self.env['kiosk.api.job']._enqueue_section_propagation(section, count)
+            elif count:
+                Machine.search([('section_id', '=', section.id)]).write({
+                    'section_name': section.name,
+                    'section_location': section.location,
+                })
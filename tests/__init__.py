@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_indexes
+from . import test_query_count
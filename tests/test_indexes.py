@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+
+@tagged('post_install', '-at_install')
+class TestApiIndexes(TransactionCase):
+    """The queries behind the API routes are served by the partial indexes of kiosk.section and section.machine"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        sections = cls.env['kiosk.section'].create([{
+            'name': f'Index Section {index:03d}',
+            'section_id': f'IDX-{index:03d}',
+            'location': f'Hall {index % 5}',
+        } for index in range(50)])
+        machines = cls.env['section.machine'].create([{
+            'name': f'Index Machine {index:05d}',
+            'section_id': sections[index % len(sections)].id,
+        } for index in range(2000)])
+        # Archived rows are left out of the partial indexes
+        sections[:10].write({'active': False})
+        machines[:500].write({'active': False})
+        cls.section_ids = sections[10:].ids
+        cls.env.flush_all()
+        cls.env.cr.execute("ANALYZE kiosk_section, section_machine")
+
+    def _plan_indexes(self, query):
+        """Return the names of the indexes used by the plan of query"""
+        cr = self.env.cr
+        # A few thousand rows may still be cheapest to scan sequentially; what
+        # matters here is which index serves each query shape
+        cr.execute("SET LOCAL enable_seqscan = off")
+        cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query))
+        nodes = [cr.fetchone()[0][0]['Plan']]
+        indexes = set()
+        while nodes:
+            node = nodes.pop()
+            if node.get('Index Name'):
+                indexes.add(node['Index Name'])
+            nodes.extend(node.get('Plans', ()))
+        return indexes
+
+    def _executed_query(self, model_name, run):
+        """Call run() and return the GROUP BY query it sent on the table of model_name, as an SQL"""
+        self.env.flush_all()
+        cursor_class = type(self.env.cr)
+        execute = cursor_class.execute
+        queries = []
+
+        def record(cr, query, params=None, *args, **kwargs):
+            queries.append(query if isinstance(query, SQL) else SQL(query, *(params or ())))
+            return execute(cr, query, params, *args, **kwargs)
+
+        with patch.object(cursor_class, 'execute', record):
+            run()
+        table = self.env[model_name]._table
+        grouped = [query for query in queries if table in query.code and 'GROUP BY' in query.code]
+        self.assertEqual(len(grouped), 1, "Expected one GROUP BY query")
+        return grouped[0]
+
+    def _keyset_page(self, model_name, name):
+        """The query of a list route page after (name, 0), see SectionsMachinesAPI._read_page"""
+        return self.env[model_name]._search(
+            [('active', '=', True), '|', ('name', '>', name), '&', ('name', '=', name), ('id', '>', 0)],
+            order='name, id', limit=101,
+        ).select()
+
+    def test_sections_page(self):
+        self.assertIn('kiosk_section_active_name_id_idx',
+                      self._plan_indexes(self._keyset_page('kiosk.section', 'Index Section 020')))
+
+    def test_machines_page(self):
+        self.assertIn('section_machine_active_name_id_idx',
+                      self._plan_indexes(self._keyset_page('section.machine', 'Index Machine 01000')))
+
+    def test_machines_of_section(self):
+        query = self.env['section.machine']._search(
+            [('section_id', '=', self.section_ids[0]), ('active', '=', True)], order='name, id',
+        ).select()
+        self.assertIn('section_machine_active_section_name_id_idx', self._plan_indexes(query))
+
+    def test_machine_counts(self):
+        # The _read_group call of SectionsMachinesAPI._active_machine_counts
+        query = self._executed_query('section.machine', lambda: self.env['section.machine'].sudo()._read_group(
+            [('section_id', 'in', self.section_ids[:20]), ('active', '=', True)],
+            groupby=['section_id'],
+            aggregates=['__count'],
+        ))
+        self.assertIn('section_machine_active_section_name_id_idx', self._plan_indexes(query))
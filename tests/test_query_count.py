@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import HttpCase, tagged
+
+from ..controllers.sections_machines_api import response_cache
+
+
+@tagged('post_install', '-at_install')
+class TestSectionMachinesQueryCount(HttpCase):
+    """Routes listing the machines of a section run the same queries whatever their number"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Section = cls.env['kiosk.section']
+        cls.small = Section.create({'name': 'Query Count Small', 'section_id': 'QC-SMALL', 'location': 'Hall A'})
+        cls.large = Section.create({'name': 'Query Count Large', 'section_id': 'QC-LARGE', 'location': 'Hall B'})
+        cls.env['section.machine'].create(
+            [{'name': 'Small 001', 'section_id': cls.small.id}]
+            + [{'name': f'Large {index:03d}', 'section_id': cls.large.id} for index in range(200)]
+        )
+
+    def _get(self, path):
+        # Build every response from the database, not from the worker's cache
+        response_cache.clear()
+        response = self.url_open(path)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _query_count(self, path):
+        self.env.flush_all()
+        count = self.cr.sql_log_count
+        self._get(path)
+        return self.cr.sql_log_count - count
+
+    def _assert_constant_query_count(self, small_path, large_path):
+        # Warm up the route, the registry caches and the section code index
+        self._get(small_path)
+        self._get(large_path)
+        with self.assertQueryCount(self._query_count(small_path)):
+            return self._get(large_path)
+
+    def test_machines_by_section(self):
+        data = self._assert_constant_query_count(
+            f'/api/machines/by_section/{self.small.id}', f'/api/machines/by_section/{self.large.id}')
+        self.assertEqual(len(data['machines']), 200)
+        self.assertEqual(data['machines'][0]['section_name'], 'Query Count Large')
+        self.assertEqual(data['section']['machine_count'], 200)
+
+    def test_machines_by_section_columnar(self):
+        data = self._assert_constant_query_count(
+            f'/api/machines/by_section/{self.small.id}?format=columnar',
+            f'/api/machines/by_section/{self.large.id}?format=columnar')
+        self.assertEqual(len(data['machines']['id']), 200)
+
+    def test_section_by_code(self):
+        data = self._assert_constant_query_count('/api/sections/by_code/QC-SMALL', '/api/sections/by_code/QC-LARGE')
+        self.assertEqual(len(data['machines']), 200)
+        self.assertEqual(data['section']['section_id'], 'QC-LARGE')